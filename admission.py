@@ -0,0 +1,190 @@
+"""
+Admission control for POST /orders ("checkout") and POST /auth/login ("login").
+Each limit has a concurrency cap and a token bucket, both shared by every
+worker on the host through a small memory-mapped file (in /dev/shm, next to
+the catalog snapshot). A request that would exceed the cap is refused with
+503 and one that finds the bucket empty with 429, both at once and with
+Retry-After, so overload turns into quick refusals instead of requests
+queueing until gunicorn's or nginx's timeout.
+
+Limits apply per host; with several API hosts behind nginx, divide them by
+the number of hosts.
+
+File layout: header (magic, number of limits), then per limit (tokens, when
+the bucket was last refilled, requests in flight), then one row per worker
+process (pid, requests in flight per limit). The rows let a worker that died
+mid-request be found and its slots returned; that check only runs when a
+limit looks full.
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from config import settings
+from metrics import record_admission_rejected
+
+LIMITS = ("checkout", "login")
+
+_MAGIC = b"TPA1"
+_MAX_WORKERS = 1024
+_HEADER = struct.Struct("<4sI")
+_LIMIT = struct.Struct("<ddq")
+_ROW = struct.Struct(f"<q{len(LIMITS)}i")
+_ROWS = _HEADER.size + len(LIMITS) * _LIMIT.size
+_SIZE = _ROWS + _MAX_WORKERS * _ROW.size
+
+def state_path() -> str:
+    """Where the shared state lives; shared memory when available, one file per database"""
+    if settings.admission_state_path:
+        return settings.admission_state_path
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    digest = hashlib.sha1(settings.database_url.encode()).hexdigest()[:12]
+    return os.path.join(directory, f"timberpunk-admission-{digest}")
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class AdmissionState:
+    """This process's mapping of the shared state. Opened in each process: a
+    flock taken through a descriptor inherited across fork excludes nothing."""
+
+    def __init__(self, path: str):
+        self.pid = os.getpid()
+        with open(f"{path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(path, "rb") as f:
+                    valid = f.read(_HEADER.size) == _HEADER.pack(_MAGIC, len(LIMITS)) and os.fstat(f.fileno()).st_size == _SIZE
+            except FileNotFoundError:
+                valid = False
+            if not valid:
+                # Replaced rather than rewritten: processes still running older code keep their own file
+                tmp_path = f"{path}.{self.pid}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(_HEADER.pack(_MAGIC, len(LIMITS)) + bytes(_SIZE - _HEADER.size))
+                os.replace(tmp_path, path)
+            self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), _SIZE)
+        self._row: Optional[int] = None
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def enter(self, limit: int, max_concurrency: int, rate: float, burst: int) -> Optional[Tuple[str, int]]:
+        """Take a slot and a token from limit. Returns None when admitted, else
+        the reason ("concurrency" or "rate") and the seconds to suggest in Retry-After."""
+        offset = _HEADER.size + limit * _LIMIT.size
+        with self._locked():
+            row = self._own_row()
+            tokens, refilled, in_flight = _LIMIT.unpack_from(self._map, offset)
+            if max_concurrency and in_flight >= max_concurrency:
+                self._reclaim()
+                tokens, refilled, in_flight = _LIMIT.unpack_from(self._map, offset)
+                if in_flight >= max_concurrency:
+                    return "concurrency", settings.admission_retry_after_seconds
+            if rate > 0:
+                # CLOCK_MONOTONIC is system-wide, so every worker's readings compare
+                now = time.monotonic()
+                tokens = min(float(burst), tokens + (now - refilled) * rate)
+                refilled = now
+                if tokens < 1:
+                    _LIMIT.pack_into(self._map, offset, tokens, refilled, in_flight)
+                    return "rate", max(1, math.ceil((1 - tokens) / rate))
+                tokens -= 1
+            _LIMIT.pack_into(self._map, offset, tokens, refilled, in_flight + 1)
+            self._add(row, limit, 1)
+        return None
+
+    def exit(self, limit: int):
+        """Return the slot taken by enter"""
+        offset = _HEADER.size + limit * _LIMIT.size
+        with self._locked():
+            tokens, refilled, in_flight = _LIMIT.unpack_from(self._map, offset)
+            _LIMIT.pack_into(self._map, offset, tokens, refilled, max(0, in_flight - 1))
+            self._add(self._own_row(), limit, -1)
+
+    def _add(self, row: int, limit: int, delta: int):
+        pid, *counts = _ROW.unpack_from(self._map, _ROWS + row * _ROW.size)
+        counts[limit] = max(0, counts[limit] + delta)
+        _ROW.pack_into(self._map, _ROWS + row * _ROW.size, pid, *counts)
+
+    def _own_row(self) -> int:
+        if self._row is None:
+            self._reclaim()
+            for row, (pid, *_) in enumerate(_ROW.iter_unpack(self._map[_ROWS:_SIZE])):
+                if pid == 0:
+                    _ROW.pack_into(self._map, _ROWS + row * _ROW.size, self.pid, *[0] * len(LIMITS))
+                    self._row = row
+                    break
+            else:
+                raise RuntimeError(f"More than {_MAX_WORKERS} processes share {state_path()}")
+        return self._row
+
+    def _reclaim(self):
+        """Free the rows of processes that have exited, returning their slots"""
+        for row, (pid, *counts) in enumerate(_ROW.iter_unpack(self._map[_ROWS:_SIZE])):
+            # A row with this pid that isn't ours was left by an earlier process given the same pid
+            if pid == 0 or row == self._row or (pid != self.pid and _alive(pid)):
+                continue
+            for limit, count in enumerate(counts):
+                offset = _HEADER.size + limit * _LIMIT.size
+                tokens, refilled, in_flight = _LIMIT.unpack_from(self._map, offset)
+                _LIMIT.pack_into(self._map, offset, tokens, refilled, max(0, in_flight - count))
+            _ROW.pack_into(self._map, _ROWS + row * _ROW.size, 0, *[0] * len(LIMITS))
+
+_state: Optional[AdmissionState] = None
+
+def _shared_state() -> AdmissionState:
+    global _state
+    if _state is None or _state.pid != os.getpid():
+        _state = AdmissionState(state_path())
+    return _state
+
+def admit(name: str):
+    """Dependency for a route under the named limit: refuses the request with
+    503 or 429 when the limit is reached, else holds a slot until it finishes"""
+    limit = LIMITS.index(name)
+
+    async def admission():
+        if not settings.admission_control:
+            yield
+            return
+        state = _shared_state()
+        refusal = state.enter(
+            limit,
+            getattr(settings, f"{name}_max_concurrency"),
+            getattr(settings, f"{name}_rate_per_second"),
+            getattr(settings, f"{name}_burst"),
+        )
+        if refusal is not None:
+            reason, retry_after = refusal
+            record_admission_rejected(name, reason)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE if reason == "concurrency" else status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Server busy, try again shortly" if reason == "concurrency" else "Too many requests, try again shortly",
+                headers={"Retry-After": str(retry_after)},
+            )
+        try:
+            yield
+        finally:
+            state.exit(limit)
+
+    return admission
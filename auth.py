@@ -1,28 +1,24 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from cache import TTLCache
 from config import settings
-from database import get_db
+from database import AsyncSessionLocal, get_async_db
 from models import Admin
+from passwords import get_password_hash, verify_and_update_async
 import schemas
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Bearer token scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+# Verified token -> Admin, so authenticated requests skip the admin lookup
+principal_cache = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
@@ -36,28 +32,58 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def authenticate_admin(db: Session, email: str, password: str) -> Optional[Admin]:
-    """Authenticate an admin user"""
-    admin = db.query(Admin).filter(Admin.email == email).first()
+async def authenticate_admin(db: AsyncSession, email: str, password: str) -> Optional[Admin]:
+    """Authenticate an admin user, upgrading the stored hash if its cost is outdated.
+    Raises passwords.HasherBusy when the password executor is saturated."""
+    admin = await db.scalar(select(Admin).where(Admin.email == email))
     if not admin:
         return None
-    if not verify_password(password, admin.hashed_password):
+    valid, new_hash = await verify_and_update_async(password, admin.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        admin.hashed_password = new_hash
+        await db.commit()
     return admin
 
 async def get_current_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Admin:
     """Get the current authenticated admin from JWT token"""
+    return await admin_for_token(db, credentials.credentials)
+
+async def get_stream_admin(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None, description="For EventSource, which can't send headers"),
+) -> Admin:
+    """Like get_current_admin, also accepting the token as ?access_token=.
+
+    Used by long-lived streams, so the lookup gets its own short session
+    instead of a request session held open for the whole stream."""
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    async with AsyncSessionLocal() as db:  # Connects only on a principal cache miss
+        return await admin_for_token(db, token)
+
+async def admin_for_token(db: AsyncSession, token: str) -> Admin:
+    """The admin a JWT belongs to, or a 401"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    admin = principal_cache.get(token)
+    if admin is not None:
+        return admin
+    
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
         if email is None:
@@ -66,12 +92,21 @@ async def get_current_admin(
     except JWTError:
         raise credentials_exception
     
-    admin = db.query(Admin).filter(Admin.email == token_data.email).first()
+    admin = await db.scalar(select(Admin).where(Admin.email == token_data.email))
     if admin is None:
         raise credentials_exception
     
+    # Cached detached from the session; never cached past the token's expiry
+    db.expunge(admin)
+    principal_cache.set(token, admin, expires_at=payload.get("exp"))
     return admin
 
+@event.listens_for(Admin, "after_update")
+@event.listens_for(Admin, "after_delete")
+def _invalidate_cached_admin(mapper, connection, target):
+    """Drop cached principals for an admin changed or removed through the ORM"""
+    principal_cache.invalidate(lambda admin: admin.id == target.id)
+
 def init_admin(db: Session):
     """Initialize default admin user if not exists"""
     admin = db.query(Admin).filter(Admin.email == settings.admin_email).first()
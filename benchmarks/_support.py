@@ -0,0 +1,105 @@
+"""
+Shared setup for the benchmark scripts.
+Each benchmark runs the app in-process against a throwaway SQLite database
+(or BENCH_DATABASE_URL if set), so it never touches the real timberpunk.db.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Set once, so helper processes spawned by the app reuse the parent's database
+if "BENCH_DATABASE_URL" not in os.environ:
+    _tmpdir = tempfile.mkdtemp(prefix="timberpunk-bench-")
+    os.environ["BENCH_DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("ADMIN_EMAIL", "admin@timberpunk.com")
+os.environ.setdefault("ADMIN_PASSWORD", "admin123")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:5173")
+# The benchmarks measure the endpoints themselves; bench_admission.py turns this on
+os.environ.setdefault("ADMISSION_CONTROL", "false")
+
+
+def load_app():
+    """Import the app with its database bootstrapped, as the gunicorn master would"""
+    from bootstrap import bootstrap
+    from main import app
+
+    bootstrap()
+    return app
+
+
+def admin_headers() -> dict:
+    """Bearer headers for the default admin, without going through bcrypt"""
+    from auth import create_access_token
+    from config import settings
+
+    token = create_access_token({"sub": settings.admin_email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(port: int, workers: int, **env) -> subprocess.Popen:
+    """Start gunicorn on the benchmark database with extra settings as environment
+    variables (e.g. SQL_SERVER_TIMING="false"); returns once it answers /health"""
+    import httpx
+
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), **env}
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)  # gunicorn.conf.py makes a fresh one per master
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}",
+         "--access-logfile", "/dev/null", "--max-requests", "0", "main:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def measure(fn, repeat: int = 20) -> dict:
+    """Run fn repeatedly and return latency stats in milliseconds"""
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def report(title: str, rows: list):
+    """Print benchmark rows as an aligned table"""
+    print(f"\n{title}")
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    widths = [max(len(h), *(len(_fmt(r[h])) for r in rows)) for h in headers]
+    print("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(_fmt(row[h]).rjust(w) for h, w in zip(headers, widths)))
+
+
+def _fmt(value) -> str:
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
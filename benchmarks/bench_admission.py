@@ -0,0 +1,156 @@
+"""
+Load test for admission control: POST /orders and POST /auth/login offered
+more load than the server can take, under gunicorn with several workers,
+with admission control off and on. Each client sends requests back to back
+for a fixed time over its own keep-alive connection; a refused client
+waits as long as Retry-After asks. Without admission control every request
+is eventually served, but latency grows with the queue; with it, the excess
+is refused within milliseconds and admitted requests keep a bounded tail.
+
+Usage: python benchmarks/bench_admission.py
+"""
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import _support
+
+WORKERS = 4
+DURATION = 10.0  # Seconds per scenario
+
+CHECKOUT_CLIENTS = 128
+LOGIN_CLIENTS = 32
+
+SCENARIOS = [
+    ("POST /orders", CHECKOUT_CLIENTS, "off", {}),
+    ("POST /orders", CHECKOUT_CLIENTS, "concurrency 8", {"CHECKOUT_MAX_CONCURRENCY": "8", "CHECKOUT_RATE_PER_SECOND": "0"}),
+    ("POST /orders", CHECKOUT_CLIENTS, "rate 50/s", {"CHECKOUT_MAX_CONCURRENCY": "0", "CHECKOUT_RATE_PER_SECOND": "50", "CHECKOUT_BURST": "50"}),
+    ("POST /auth/login", LOGIN_CLIENTS, "off", {}),
+    ("POST /auth/login", LOGIN_CLIENTS, "defaults", {}),
+    ("POST /auth/login", LOGIN_CLIENTS, "concurrency 2", {"LOGIN_MAX_CONCURRENCY": "2"}),
+]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client. httpx spends more CPU per request than
+    the endpoints do, which on a small box throttles the server it is measuring."""
+
+    def __init__(self, port: int, path: str, payload: dict):
+        body = json.dumps(payload).encode()
+        self.port = port
+        self.request = (
+            f"POST {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode() + body
+        self.reader = self.writer = None
+
+    async def post(self) -> tuple:
+        """(status code, Retry-After seconds or None)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.writer.write(self.request)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        headers = dict(line.lower().split(": ", 1) for line in lines[1:] if line)
+        await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            self.close()
+        retry_after = headers.get("retry-after")
+        return int(lines[0].split()[1]), float(retry_after) if retry_after else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def load(port: int, path: str, payload: dict, clients: int) -> dict:
+    admitted, refused, statuses = [], [], Counter()
+    deadline = time.monotonic() + DURATION
+
+    async def user():
+        connection = Connection(port, path, payload)
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status, retry_after = await connection.post()
+            except (OSError, asyncio.IncompleteReadError):
+                # Workers drop the connection after an unhandled error such as "database is locked"
+                connection.close()
+                statuses["dropped"] += 1
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            statuses[status] += 1
+            if status in (429, 503):
+                refused.append(elapsed)
+                await asyncio.sleep(retry_after or 1)
+            elif status < 400:
+                admitted.append(elapsed)
+        connection.close()
+
+    start = time.monotonic()
+    await asyncio.gather(*(user() for _ in range(clients)))
+    elapsed = time.monotonic() - start
+
+    admitted.sort()
+    refused.sort()
+    return {
+        "ok_per_s": len(admitted) / elapsed,
+        "ok_median_ms": statistics.median(admitted) if admitted else 0.0,
+        "ok_p99_ms": percentile(admitted, 0.99),
+        "ok_max_ms": admitted[-1] if admitted else 0.0,
+        "refused": len(refused),
+        "refused_p99_ms": percentile(refused, 0.99),
+        "other": sum(count for code, count in statuses.items() if code not in (200, 201, 429, 503)),
+    }
+
+
+def main():
+    _support.load_app()
+    from config import settings
+    from database import engine
+    from models import Product
+
+    with engine.begin() as conn:
+        product_id = conn.execute(Product.__table__.insert().values(
+            name="Bench Product", description="Benchmark", price=14.0, category="gifts"
+        )).inserted_primary_key[0]
+    engine.dispose()
+    payloads = {
+        "POST /orders": ("/orders/", {
+            "first_name": "Bench",
+            "last_name": "Customer",
+            "email": "bench@example.com",
+            "shipping_address": "1 Sawdust Lane",
+            "items": [{"product_id": product_id, "quantity": 1}],
+        }),
+        "POST /auth/login": ("/auth/login", {"email": settings.admin_email, "password": settings.admin_password}),
+    }
+
+    rows = []
+    for route, clients, label, env in SCENARIOS:
+        port = _support.free_port()
+        server = _support.start_gunicorn(
+            port, WORKERS, SQL_SERVER_TIMING="false", ADMISSION_CONTROL=str(label != "off").lower(), **env,
+        )
+        try:
+            path, payload = payloads[route]
+            result = asyncio.run(load(port, path, payload, clients))
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append({"route": route, "clients": clients, "admission": label, **result})
+
+    _support.report(f"Overload, {WORKERS} workers, {DURATION:.0f} s per scenario (other = 5xx besides 503, or dropped)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark importing a supplier catalog: POST /products/bulk (NDJSON and CSV)
+versus one POST /products per item, as seed_data.py does. The per-item path
+republishes the catalog after every write, so it is timed on a smaller sample.
+
+Usage: python benchmarks/bench_bulk_import.py
+"""
+import csv
+import io
+import json
+import time
+
+import _support
+from fastapi.testclient import TestClient
+
+CATALOG_SIZE = 5_000
+PER_ITEM_SAMPLE = 300
+
+
+def supplier_rows(prefix: str, count: int) -> list:
+    return [
+        {
+            "sku": f"{prefix}-{i:05d}",
+            "name": f"Walnut Piece {i}",
+            "description": "Hand-finished walnut piece. " * 4,
+            "short_description": "Walnut piece",
+            "price": 20.0 + i % 50,
+            "category": ["wall art", "coasters", "signs", "gifts"][i % 4],
+            "options": json.dumps({"sizes": ["12x12", "16x16"], "finishes": ["Natural", "Dark Walnut"]}),
+        }
+        for i in range(count)
+    ]
+
+
+def as_ndjson(rows: list) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+def as_csv(rows: list) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def main():
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+
+    results = []
+
+    rows = supplier_rows("ITEM", PER_ITEM_SAMPLE)
+    start = time.perf_counter()
+    for row in rows:
+        response = client.post("/products/", headers=headers, json=row)
+        assert response.status_code == 201, response.text
+    elapsed = time.perf_counter() - start
+    results.append({"path": "POST /products per item", "rows": len(rows), "seconds": elapsed,
+                    "rows_per_s": len(rows) / elapsed})
+
+    for name, content_type, encode in (
+        ("ndjson", "application/x-ndjson", as_ndjson),
+        ("csv", "text/csv", as_csv),
+    ):
+        for action in ("create", "update"):
+            body = encode(supplier_rows(name.upper(), CATALOG_SIZE))
+            start = time.perf_counter()
+            response = client.post("/products/bulk", headers={**headers, "Content-Type": content_type}, content=body)
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200 and not response.json()["errors"], response.text
+            results.append({"path": f"POST /products/bulk {name} ({action})", "rows": CATALOG_SIZE,
+                            "seconds": elapsed, "rows_per_s": CATALOG_SIZE / elapsed})
+
+    baseline = results[0]["rows_per_s"]
+    for result in results:
+        result["speedup"] = result["rows_per_s"] / baseline
+    _support.report("Product import throughput", results)
+
+
+if __name__ == "__main__":
+    main()
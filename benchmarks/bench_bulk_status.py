@@ -0,0 +1,65 @@
+"""
+Benchmark marking a day's shipments COMPLETED: one PATCH /orders/{id} per
+order versus a single PATCH /orders/bulk, counting statements for each.
+
+Usage: python benchmarks/bench_bulk_status.py
+"""
+import time
+
+import _support
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import async_engine, engine
+from models import Product
+
+SHIPMENTS = 300
+
+
+def main():
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+
+    with engine.begin() as conn:
+        product_id = conn.execute(Product.__table__.insert().values(
+            name="Bench Product", description="Benchmark", price=14.0, category="gifts"
+        )).inserted_primary_key[0]
+    payload = {
+        "first_name": "Bench",
+        "last_name": "Customer",
+        "email": "bench@example.com",
+        "shipping_address": "1 Sawdust Lane",
+        "items": [{"product_id": product_id, "quantity": 2}],
+    }
+
+    def place_orders() -> list:
+        return [client.post("/orders/", json=payload).json() for _ in range(SHIPMENTS)]
+
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    rows = []
+    orders = place_orders()
+    statements.clear()
+    start = time.perf_counter()
+    for order in orders:
+        response = client.patch(f"/orders/{order['id']}", headers=headers, json={"status": "COMPLETED"})
+        assert response.status_code == 200, response.text
+    rows.append({"path": "PATCH /orders/{id} per order", "orders": SHIPMENTS,
+                 "statements": len(statements), "seconds": time.perf_counter() - start})
+
+    orders = place_orders()
+    statements.clear()
+    start = time.perf_counter()
+    response = client.patch("/orders/bulk", headers=headers, json={
+        "status": "COMPLETED", "orders": [{"id": order["id"], "version": order["version"]} for order in orders],
+    })
+    assert response.status_code == 200 and not response.json()["rejected"], response.text
+    rows.append({"path": "PATCH /orders/bulk", "orders": SHIPMENTS,
+                 "statements": len(statements), "seconds": time.perf_counter() - start})
+
+    _support.report(f"Completing {SHIPMENTS} orders", rows)
+
+
+if __name__ == "__main__":
+    main()
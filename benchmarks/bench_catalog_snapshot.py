@@ -0,0 +1,67 @@
+"""
+Benchmark GET /products throughput served from the shared catalog snapshot
+versus querying and serializing the products on every request.
+
+Usage: python benchmarks/bench_catalog_snapshot.py
+"""
+import asyncio
+import time
+
+import _support
+import httpx
+from sqlalchemy import update
+
+CATALOG_SIZES = [100, 1_000, 5_000]
+DURATION = 2.0  # seconds per measurement
+
+
+async def throughput(client: httpx.AsyncClient, params: dict) -> float:
+    await client.get("/products/", params=params)  # warm up / publish
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        response = await client.get("/products/", params=params)
+        assert response.status_code == 200
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+async def run():
+    app = _support.load_app()
+    from config import settings
+    from database import engine
+    from models import CatalogVersion, Product
+
+    rows = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        existing = 0
+        for size in CATALOG_SIZES:
+            with engine.begin() as conn:
+                conn.execute(Product.__table__.insert(), [
+                    {
+                        "name": f"Bench Product {i}",
+                        "description": "Hand-finished walnut piece. " * 8,
+                        "short_description": "Walnut piece",
+                        "price": 20.0 + i % 50,
+                        "category": ["wall art", "coasters", "signs", "gifts"][i % 4],
+                        "options": '{"sizes": ["12x12", "16x16"], "finishes": ["Natural", "Dark Walnut"]}',
+                    }
+                    for i in range(existing, size)
+                ])
+                # Product writes must bump the catalog generation
+                conn.execute(update(CatalogVersion).values(version=CatalogVersion.version + 1))
+            existing = size
+
+            for params in ({}, {"category": "coasters"}):
+                result = {"products": size, "filter": params.get("category", "-")}
+                for enabled, label in ((False, "query_req_s"), (True, "snapshot_req_s")):
+                    settings.catalog_snapshot_enabled = enabled
+                    result[label] = await throughput(client, params)
+                result["speedup"] = result["snapshot_req_s"] / result["query_req_s"]
+                rows.append(result)
+
+    _support.report(f"GET /products throughput (single worker, {DURATION:.0f}s each)", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,61 @@
+"""
+Benchmark POST /orders latency and statement count against cart size.
+Checkout should issue a fixed number of statements (product lookup, order
+insert, item insert, commit) no matter how many lines the cart has.
+
+Usage: python benchmarks/bench_checkout.py
+"""
+import _support
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import async_engine, engine
+from models import Product
+
+CART_SIZES = [1, 5, 20, 50]
+
+
+def main():
+    client = TestClient(_support.load_app())
+
+    with engine.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {"name": f"Bench Product {i}", "description": "Benchmark", "price": 10.0 + i, "category": "gifts"}
+            for i in range(max(CART_SIZES))
+        ])
+        product_ids = [row.id for row in conn.execute(Product.__table__.select())]
+
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    rows = []
+    for size in CART_SIZES:
+        payload = {
+            "first_name": "Bench",
+            "last_name": "Customer",
+            "email": "bench@example.com",
+            "shipping_address": "1 Sawdust Lane",
+            "items": [{"product_id": pid, "quantity": 1} for pid in product_ids[:size]],
+        }
+
+        def checkout():
+            response = client.post("/orders/", json=payload)
+            assert response.status_code == 201, response.text
+
+        statements.clear()
+        checkout()
+        per_checkout = len(statements)
+
+        stats = _support.measure(checkout, repeat=50)
+        rows.append({
+            "cart_lines": size,
+            "statements": per_checkout,
+            "median_ms": stats["median_ms"],
+            "p95_ms": stats["p95_ms"],
+        })
+
+    _support.report("POST /orders", rows)
+
+
+if __name__ == "__main__":
+    main()
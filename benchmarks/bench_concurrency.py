@@ -0,0 +1,55 @@
+"""
+Benchmark how a single worker's event loop behaves while DB-backed admin
+requests are in flight. /health latency measured alongside a burst of
+authenticated GET /orders calls should stay close to its idle value.
+
+Usage: python benchmarks/bench_concurrency.py
+"""
+import asyncio
+import statistics
+import time
+
+import _support
+import httpx
+
+
+CONCURRENCY = [1, 16, 64]
+HEALTH_PROBES = 20
+
+
+async def probe_health(client: httpx.AsyncClient) -> list:
+    samples = []
+    for _ in range(HEALTH_PROBES):
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.001)
+    return samples
+
+
+async def run():
+    headers = _support.admin_headers()
+    transport = httpx.ASGITransport(app=_support.load_app())
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        idle = await probe_health(client)
+        for concurrency in CONCURRENCY:
+            start = time.perf_counter()
+            load = asyncio.gather(*(
+                client.get("/orders/", headers=headers) for _ in range(concurrency * 4)
+            ))
+            health, responses = await asyncio.gather(probe_health(client), load)
+            elapsed = time.perf_counter() - start
+            assert all(r.status_code == 200 for r in responses)
+            rows.append({
+                "in_flight": concurrency * 4,
+                "orders_req_per_s": len(responses) / elapsed,
+                "health_median_ms": statistics.median(health),
+                "health_max_ms": max(health),
+            })
+    print(f"\nIdle /health median: {statistics.median(idle):.2f} ms")
+    _support.report("/health latency under concurrent GET /orders", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,134 @@
+"""
+Benchmark GET /orders/export peak memory and duration as the orders table grows.
+Each export runs in a fresh process so its peak RSS is its own. The baseline
+loads every order with its items and serializes the list in one go, as the
+unpaginated GET /orders used to. Export peak RSS should stay flat.
+
+SQLite's memory-mapped I/O and page cache would otherwise show up in RSS in
+proportion to the database file (up to SQLITE_MMAP_SIZE + SQLITE_CACHE_SIZE_KIB),
+so the measured processes run with mmap off and an 8 MiB page cache.
+
+Usage: python benchmarks/bench_export.py
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import _support
+from bench_orders_pagination import grow_orders_to
+
+SIZES = [10_000, 50_000, 100_000]
+MODES = ["csv", "ndjson", "load_all"]
+MEASURE_ENV = {"SQLITE_MMAP_SIZE": "0", "SQLITE_CACHE_SIZE_KIB": "8192"}
+
+
+def _status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def rss_mb() -> float:
+    return _status_mb("VmRSS")
+
+
+def peak_rss_mb() -> float:
+    # Not ru_maxrss: that survives fork/exec and would report the parent's peak
+    return _status_mb("VmHWM")
+
+
+async def export(app, export_format: str) -> int:
+    """Drive the ASGI app directly, discarding body chunks as they arrive"""
+    received = 0
+    path = "/orders/export"
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "server": ("bench", 80), "client": ("127.0.0.1", 1), "root_path": "",
+        "path": path, "raw_path": path.encode(), "query_string": f"format={export_format}".encode(),
+        "headers": [
+            (key.lower().encode(), value.encode()) for key, value in _support.admin_headers().items()
+        ],
+    }
+
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:  # The client never disconnects
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+        elif message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+
+def load_all() -> int:
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+
+    import schemas
+    from database import SessionLocal
+    from models import Order
+
+    with SessionLocal() as db:
+        orders = db.scalars(select(Order).options(selectinload(Order.items)).order_by(Order.id)).all()
+        body = json.dumps([schemas.Order.model_validate(o).model_dump(mode="json") for o in orders])
+    return len(body)
+
+
+def measure(mode: str):
+    """Child process: run one export and print its stats as JSON"""
+    from main import app
+
+    before = rss_mb()
+    start = time.perf_counter()
+    size = load_all() if mode == "load_all" else asyncio.run(export(app, mode))
+    print(json.dumps({
+        "seconds": time.perf_counter() - start,
+        "mb": size / 2**20,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - before,
+    }))
+
+
+def main():
+    _support.load_app()
+    from database import engine
+    from models import Product
+
+    with engine.begin() as conn:
+        product_id = conn.execute(Product.__table__.insert().values(
+            name="Bench Product", description="Benchmark", price=14.0, category="gifts"
+        )).inserted_primary_key[0]
+
+    rows = []
+    for size in SIZES:
+        grow_orders_to(size, product_id)
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", mode],
+                check=True, capture_output=True, text=True, env={**os.environ, **MEASURE_ENV},
+            ).stdout
+            rows.append({"orders": size, "mode": mode, **json.loads(output.strip().splitlines()[-1])})
+
+    _support.report("GET /orders/export (one process per export)", rows)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,92 @@
+"""
+Benchmark GET /products and GET /orders responses per second at 100, 1k and
+10k rows, with FAST_SERIALIZATION off and on. The catalog snapshot is
+disabled so /products is built from the database, and the orders page size
+cap is lifted so one page holds every row. Both modes must return the same
+bytes.
+
+Usage: python benchmarks/bench_fast_serialization.py
+"""
+from datetime import datetime, timedelta
+
+import _support
+from fastapi.testclient import TestClient
+
+from config import settings
+from database import engine
+from models import Order, OrderItem, OrderStatus, Product
+
+SIZES = [100, 1_000, 10_000]
+ITEMS_PER_ORDER = 3
+
+
+def grow_to(target: int):
+    """Bulk-insert products and orders (with items) until each table holds `target` rows"""
+    with engine.begin() as conn:
+        start = conn.execute(Product.__table__.select().with_only_columns(Product.id)).fetchall()
+        conn.execute(Product.__table__.insert(), [
+            {"id": i + 1, "name": f"Bench Product {i}", "description": "Benchmark",
+             "price": 14.0 + i % 100 / 4, "category": "gifts"}
+            for i in range(len(start), target)
+        ])
+        base = datetime(2024, 1, 1)
+        start = conn.execute(Order.__table__.select().with_only_columns(Order.id)).fetchall()
+        orders = [
+            {
+                "id": i + 1,
+                "first_name": "Bench",
+                "last_name": f"Customer {i}",
+                "email": f"bench{i}@example.com",
+                "shipping_address": "1 Sawdust Lane",
+                "status": OrderStatus.NEW,
+                "total": 42.75,
+                "created_at": base + timedelta(seconds=i),
+            }
+            for i in range(len(start), target)
+        ]
+        conn.execute(Order.__table__.insert(), orders)
+        conn.execute(OrderItem.__table__.insert(), [
+            {
+                "order_id": o["id"],
+                "product_id": 1,
+                "product_name": "Bench Product 0",
+                "product_price": 14.25,
+                "quantity": 1,
+            }
+            for o in orders for _ in range(ITEMS_PER_ORDER)
+        ])
+
+
+def main():
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+    settings.catalog_snapshot_enabled = False
+    settings.orders_max_page_size = max(SIZES)
+
+    rows = []
+    for size in SIZES:
+        grow_to(size)
+        for path, params in (("/products/", {}), ("/orders/", {"limit": size})):
+            bodies, stats = {}, {}
+            for fast in (False, True):
+                settings.fast_serialization = fast
+
+                def get():
+                    response = client.get(path, params=params, headers=headers)
+                    assert response.status_code == 200, response.text
+                    bodies[fast] = response.content
+
+                stats[fast] = _support.measure(get, repeat=10)
+            assert bodies[False] == bodies[True], f"{path} bodies differ at {size} rows"
+            off, on = stats[False]["median_ms"], stats[True]["median_ms"]
+            rows.append({
+                "path": path, "rows": size,
+                "off_per_s": 1000 / off, "on_per_s": 1000 / on, "speedup": off / on,
+                "off_p95_ms": stats[False]["p95_ms"], "on_p95_ms": stats[True]["p95_ms"],
+            })
+
+    _support.report("Responses per second, regular vs fast serialization (identical bodies)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark checkout throughput on SQLite with several gunicorn workers, with
+and without CHECKOUT_GROUP_COMMIT. Each mode starts its own gunicorn against
+the benchmark database and sends a burst of concurrent POST /orders. The
+group-commit batch size and the latency it added are read from /metrics.
+
+Usage: python benchmarks/bench_group_commit.py
+"""
+import asyncio
+import re
+import statistics
+import time
+
+import _support
+import httpx
+
+WORKERS = 4
+CLIENTS = 64
+ORDERS = 3_000
+
+
+def histogram_mean(metrics: str, name: str) -> float:
+    total = re.search(rf"^{name}_sum (\S+)$", metrics, re.M)
+    count = re.search(rf"^{name}_count (\S+)$", metrics, re.M)
+    if not total or not count or float(count.group(1)) == 0:
+        return 0.0
+    return float(total.group(1)) / float(count.group(1))
+
+
+async def burst(base_url: str, payload: dict) -> dict:
+    latencies, failures = [], 0
+    queue = iter(range(ORDERS))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60,
+                                 limits=httpx.Limits(max_connections=CLIENTS)) as client:
+        async def customer():
+            nonlocal failures
+            for _ in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/orders/", json=payload)
+                except httpx.TransportError:
+                    # Workers drop the connection after an unhandled error such as "database is locked"
+                    failures += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                failures += response.status_code != 201
+
+        start = time.perf_counter()
+        await asyncio.gather(*(customer() for _ in range(CLIENTS)))
+        elapsed = time.perf_counter() - start
+        metrics = (await client.get("/metrics")).text
+
+    latencies.sort()
+    return {
+        "orders_per_s": ORDERS / elapsed,
+        "median_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "failed": failures,
+        "mean_batch": histogram_mean(metrics, "checkout_group_commit_batch_size"),
+        "mean_added_ms": histogram_mean(metrics, "checkout_group_commit_added_seconds") * 1000,
+    }
+
+
+def main():
+    _support.load_app()
+    from database import engine
+    from models import Product
+
+    with engine.begin() as conn:
+        product_id = conn.execute(Product.__table__.insert().values(
+            name="Bench Product", description="Benchmark", price=14.0, category="gifts"
+        )).inserted_primary_key[0]
+    engine.dispose()
+    payload = {
+        "first_name": "Bench",
+        "last_name": "Customer",
+        "email": "bench@example.com",
+        "shipping_address": "1 Sawdust Lane",
+        "items": [{"product_id": product_id, "quantity": 1}],
+    }
+
+    rows = []
+    for group_commit in (False, True):
+        port = _support.free_port()
+        server = _support.start_gunicorn(
+            port, WORKERS, CHECKOUT_GROUP_COMMIT=str(group_commit).lower(), SQL_SERVER_TIMING="false",
+        )
+        try:
+            result = asyncio.run(burst(f"http://127.0.0.1:{port}", payload))
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append({"group_commit": "on" if group_commit else "off", **result})
+
+    _support.report(f"POST /orders, {WORKERS} workers, {CLIENTS} concurrent customers, {ORDERS} orders", rows)
+
+
+if __name__ == "__main__":
+    main()
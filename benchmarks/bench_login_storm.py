@@ -0,0 +1,71 @@
+"""
+Load test: storefront catalog latency during a burst of admin logins.
+bcrypt runs on the dedicated password executor, so GET /products latency
+should stay near its idle value while logins queue or are rejected with 503.
+
+Usage: python benchmarks/bench_login_storm.py
+"""
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import _support
+import httpx
+
+STORM_SIZE = 64
+CATALOG_PROBES = 50
+
+
+async def probe_catalog(client: httpx.AsyncClient) -> list:
+    samples = []
+    for _ in range(CATALOG_PROBES):
+        start = time.perf_counter()
+        response = await client.get("/products/")
+        assert response.status_code == 200
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return samples
+
+
+async def login(client: httpx.AsyncClient, credentials: dict) -> int:
+    response = await client.post("/auth/login", json=credentials)
+    return response.status_code
+
+
+def summarize(label: str, samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "phase": label,
+        "catalog_median_ms": statistics.median(samples),
+        "catalog_p95_ms": samples[int(len(samples) * 0.95) - 1],
+        "catalog_max_ms": samples[-1],
+    }
+
+
+async def run():
+    from config import settings
+    from passwords import shutdown_executor
+
+    credentials = {"email": settings.admin_email, "password": settings.admin_password}
+    transport = httpx.ASGITransport(app=_support.load_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await login(client, credentials)  # start the executor's processes
+        idle = await probe_catalog(client)
+
+        start = time.perf_counter()
+        storm = asyncio.gather(*(login(client, credentials) for _ in range(STORM_SIZE)))
+        during, statuses = await asyncio.gather(probe_catalog(client), storm)
+        elapsed = time.perf_counter() - start
+
+    shutdown_executor()
+    _support.report("GET /products latency", [summarize("idle", idle), summarize("login storm", during)])
+    outcomes = Counter(statuses)
+    print(f"\n{STORM_SIZE} concurrent logins in {elapsed:.2f}s: "
+          f"{outcomes.get(200, 0)} accepted, {outcomes.get(503, 0)} rejected with 503 "
+          f"(bcrypt_rounds={settings.bcrypt_rounds}, workers={settings.password_hash_workers}, "
+          f"max_pending={settings.password_hash_max_pending})")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,121 @@
+"""
+Benchmark the admin order endpoints as order history grows, with every order
+in the hot tables and after order_archive.py has moved the finished ones out.
+Each size starts from empty tables: HOT open orders from the last month, plus
+`size` completed or canceled orders from the years before. Index-backed
+reads (pages, status filter, one order) should stay flat either way; scans
+such as the export grow with history until it is archived. Also reports how
+fast the archive job moves orders.
+
+Usage: python benchmarks/bench_order_archive.py
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import _support
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from config import settings
+from database import SessionLocal, engine
+from models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus, Product
+from order_archive import archive_orders
+
+HOT = 2_000
+HISTORY_SIZES = [10_000, 100_000, 300_000]
+ITEMS_PER_ORDER = 2
+CHUNK = 20_000
+
+
+def reset_orders():
+    with engine.begin() as conn:
+        for model in (ArchivedOrderItem, ArchivedOrder, OrderItem, Order):
+            conn.execute(delete(model))
+
+
+def insert_orders(first_id: int, count: int, newest: datetime, statuses: list):
+    """count orders, one minute apart and ending at newest, cycling through statuses"""
+    for start in range(0, count, CHUNK):
+        orders = [
+            {
+                "id": first_id + i,
+                "first_name": "Bench",
+                "last_name": f"Customer {i}",
+                "email": f"bench{i}@example.com",
+                "shipping_address": "1 Sawdust Lane",
+                "status": statuses[i % len(statuses)],
+                "total": 28.0,
+                "created_at": newest - timedelta(minutes=count - i),
+            }
+            for i in range(start, min(start + CHUNK, count))
+        ]
+        with engine.begin() as conn:
+            conn.execute(Order.__table__.insert(), orders)
+            conn.execute(OrderItem.__table__.insert(), [
+                {"order_id": o["id"], "product_id": 1, "product_name": "Bench Product",
+                 "product_price": 14.0, "quantity": 1}
+                for o in orders for _ in range(ITEMS_PER_ORDER)
+            ])
+
+
+def main():
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+    with engine.begin() as conn:
+        conn.execute(Product.__table__.insert().values(
+            id=1, name="Bench Product", description="Benchmark", price=14.0, category="gifts"
+        ))
+
+    now = datetime.utcnow()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.order_archive_after_days)
+    hot_order_id = None
+
+    def latencies() -> dict:
+        def first_page():
+            assert client.get("/orders/", headers=headers).status_code == 200
+
+        def by_status():
+            assert client.get("/orders/", params={"status": "IN_PROGRESS"}, headers=headers).status_code == 200
+
+        def deep_page():
+            cursor = None
+            for _ in range(10):
+                params = {"cursor": cursor} if cursor else {}
+                cursor = client.get("/orders/", params=params, headers=headers).json()["next_cursor"]
+
+        def one_order():
+            assert client.get(f"/orders/{hot_order_id}", headers=headers).status_code == 200
+
+        def export():
+            response = client.get("/orders/export", params={"format": "ndjson"}, headers=headers)
+            assert response.status_code == 200
+
+        return {
+            "first_page_ms": _support.measure(first_page)["median_ms"],
+            "by_status_ms": _support.measure(by_status)["median_ms"],
+            "10_pages_ms": _support.measure(deep_page, repeat=5)["median_ms"],
+            "get_order_ms": _support.measure(one_order)["median_ms"],
+            "export_ms": _support.measure(export, repeat=2)["median_ms"],
+        }
+
+    rows = []
+    for size in HISTORY_SIZES:
+        reset_orders()
+        history_end = now - timedelta(days=settings.order_archive_after_days + 1)
+        insert_orders(1, size, history_end, [OrderStatus.COMPLETED, OrderStatus.COMPLETED, OrderStatus.CANCELED])
+        insert_orders(size + 1, HOT, now, [OrderStatus.NEW, OrderStatus.IN_PROGRESS])
+        hot_order_id = size + HOT // 2
+
+        rows.append({"history": size, "tables": "all hot", **latencies(), "archived_per_s": "-"})
+        start = time.perf_counter()
+        with SessionLocal() as session:
+            moved = archive_orders(session, cutoff)
+        elapsed = time.perf_counter() - start
+        assert moved == size, (moved, size)
+        rows.append({"history": size, "tables": "archived", **latencies(), "archived_per_s": f"{moved / elapsed:.0f}"})
+
+    _support.report(f"Admin order endpoints with {HOT} open orders and growing history (median ms)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark GET /orders latency as the orders table grows.
+With keyset pagination the first page and a deep page should cost about the
+same whether the table holds 1k or 50k orders.
+
+Usage: python benchmarks/bench_orders_pagination.py
+"""
+from datetime import datetime, timedelta
+
+import _support
+from fastapi.testclient import TestClient
+
+from database import engine
+from models import Order, OrderItem, Product, OrderStatus
+
+SIZES = [1_000, 10_000, 50_000]
+ITEMS_PER_ORDER = 3
+
+
+def grow_orders_to(target: int, product_id: int):
+    """Bulk-insert orders (with items) until the table holds `target` rows"""
+    with engine.begin() as conn:
+        current = conn.execute(Order.__table__.select().with_only_columns(Order.id)).fetchall()
+        start = len(current)
+        base = datetime(2024, 1, 1)
+        orders = [
+            {
+                "id": i + 1,
+                "first_name": "Bench",
+                "last_name": f"Customer {i}",
+                "email": f"bench{i}@example.com",
+                "shipping_address": "1 Sawdust Lane",
+                "status": OrderStatus.NEW,
+                "total": 42.0,
+                "created_at": base + timedelta(seconds=i),
+            }
+            for i in range(start, target)
+        ]
+        if not orders:
+            return
+        conn.execute(Order.__table__.insert(), orders)
+        conn.execute(OrderItem.__table__.insert(), [
+            {
+                "order_id": o["id"],
+                "product_id": product_id,
+                "product_name": "Bench Product",
+                "product_price": 14.0,
+                "quantity": 1,
+            }
+            for o in orders for _ in range(ITEMS_PER_ORDER)
+        ])
+
+
+def main():
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+
+    with engine.begin() as conn:
+        product_id = conn.execute(Product.__table__.insert().values(
+            name="Bench Product", description="Benchmark", price=14.0, category="gifts"
+        )).inserted_primary_key[0]
+
+    rows = []
+    for size in SIZES:
+        grow_orders_to(size, product_id)
+
+        def first_page():
+            response = client.get("/orders/", headers=headers)
+            assert response.status_code == 200, response.text
+
+        # Walk a few pages in to measure a cursor-filtered page as well
+        cursor = None
+        for _ in range(5):
+            params = {"cursor": cursor} if cursor else {}
+            cursor = client.get("/orders/", params=params, headers=headers).json()["next_cursor"]
+
+        def deep_page():
+            response = client.get("/orders/", params={"cursor": cursor}, headers=headers)
+            assert response.status_code == 200, response.text
+
+        first = _support.measure(first_page)
+        deep = _support.measure(deep_page)
+        rows.append({
+            "orders": size,
+            "first_page_ms": first["median_ms"],
+            "first_p95_ms": first["p95_ms"],
+            "deep_page_ms": deep["median_ms"],
+            "deep_p95_ms": deep["p95_ms"],
+        })
+
+    _support.report("GET /orders (default page size)", rows)
+
+
+if __name__ == "__main__":
+    main()
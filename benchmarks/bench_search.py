@@ -0,0 +1,77 @@
+"""
+Benchmark GET /products/search against a 100k product catalog.
+The baseline is what clients did before: download the whole (category)
+list and filter it themselves, approximated here by a LIKE scan.
+
+Usage: python benchmarks/bench_search.py
+"""
+import random
+
+import _support
+from fastapi.testclient import TestClient
+from sqlalchemy import or_, select
+
+from database import SessionLocal, engine
+from models import Product
+
+CATALOG_SIZE = 100_000
+WOODS = ["walnut", "oak", "maple", "cherry", "birch", "cedar", "pine", "ash"]
+THINGS = ["coaster", "sign", "board", "frame", "shelf", "clock", "box", "map"]
+QUERIES = ["walnut", "oak coaster", "cher", "engraved maple clock", "zebrawood"]
+
+
+def seed_catalog():
+    rng = random.Random(12)
+    with engine.begin() as conn:
+        for start in range(0, CATALOG_SIZE, 10_000):
+            conn.execute(Product.__table__.insert(), [
+                {
+                    "name": f"{rng.choice(WOODS).title()} {rng.choice(THINGS).title()} {i}",
+                    "short_description": f"Hand-finished {rng.choice(WOODS)}",
+                    "description": f"Engraved {rng.choice(THINGS)} made from {rng.choice(WOODS)}. " * 4,
+                    "price": 20.0 + i % 50,
+                    "category": ["wall art", "coasters", "signs", "gifts"][i % 4],
+                }
+                for i in range(start, min(start + 10_000, CATALOG_SIZE))
+            ])
+
+
+def like_scan(q: str) -> int:
+    with SessionLocal() as db:
+        words = q.split()
+        statement = select(Product)
+        for word in words:
+            pattern = f"%{word}%"
+            statement = statement.where(or_(
+                Product.name.ilike(pattern),
+                Product.short_description.ilike(pattern),
+                Product.description.ilike(pattern),
+            ))
+        return len(db.scalars(statement).all())
+
+
+def main():
+    app = _support.load_app()
+    seed_catalog()
+
+    rows = []
+    with TestClient(app) as client:
+        for q in QUERIES:
+            def search():
+                response = client.get("/products/search", params={"q": q})
+                assert response.status_code == 200
+            fts = _support.measure(search)
+            scan = _support.measure(lambda: like_scan(q), repeat=5)
+            rows.append({
+                "query": q,
+                "search_median_ms": fts["median_ms"],
+                "search_p95_ms": fts["p95_ms"],
+                "like_scan_median_ms": scan["median_ms"],
+                "scan_matches": like_scan(q),
+            })
+
+    _support.report(f"GET /products/search over {CATALOG_SIZE:,} products", rows)
+
+
+if __name__ == "__main__":
+    main()
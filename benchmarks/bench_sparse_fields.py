@@ -0,0 +1,78 @@
+"""
+Benchmark GET /products and GET /orders with the full representation,
+?view=summary and ?fields=, reporting payload size and latency. Products have
+a long description and options, as in the real catalog; the catalog snapshot
+is disabled so every variant reads the table.
+
+Usage: python benchmarks/bench_sparse_fields.py
+"""
+import json
+from datetime import datetime, timedelta
+
+import _support
+from fastapi.testclient import TestClient
+
+from config import settings
+from database import engine
+from models import Order, OrderItem, OrderStatus, Product
+
+ROWS = 2_000
+ITEMS_PER_ORDER = 3
+OPTIONS = json.dumps({"sizes": ["8x8", "12x12", "16x16"], "woods": ["Walnut", "Oak", "Maple", "Cherry"]})
+
+
+def seed():
+    with engine.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {"id": i + 1, "name": f"Bench Product {i}", "description": "Hand-carved hardwood sign. " * 40,
+             "short_description": "Hand-carved hardwood sign", "price": 24.5, "category": "signs",
+             "image_url": f"/images/product-{i}.jpg", "options": OPTIONS}
+            for i in range(ROWS)
+        ])
+        base = datetime(2024, 1, 1)
+        conn.execute(Order.__table__.insert(), [
+            {"id": i + 1, "first_name": "Bench", "last_name": f"Customer {i}", "email": f"bench{i}@example.com",
+             "shipping_address": "1 Sawdust Lane, Timberton", "note": "Please gift wrap",
+             "status": OrderStatus.NEW, "total": 73.5, "created_at": base + timedelta(seconds=i)}
+            for i in range(ROWS)
+        ])
+        conn.execute(OrderItem.__table__.insert(), [
+            {"order_id": i + 1, "product_id": 1, "product_name": "Bench Product 0", "product_price": 24.5,
+             "quantity": 1, "selected_options": '{"sizes": "12x12", "woods": "Walnut"}'}
+            for i in range(ROWS) for _ in range(ITEMS_PER_ORDER)
+        ])
+
+
+def main():
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+    settings.catalog_snapshot_enabled = False
+    settings.orders_max_page_size = ROWS
+    seed()
+
+    variants = [
+        ("/products/", "full", {}),
+        ("/products/", "view=summary", {"view": "summary"}),
+        ("/products/", "fields=id,name,price", {"fields": "id,name,price"}),
+        ("/orders/", "full", {"limit": ROWS}),
+        ("/orders/", "view=summary", {"view": "summary", "limit": ROWS}),
+        ("/orders/", "fields=id,status,total", {"fields": "id,status,total", "limit": ROWS}),
+    ]
+    rows = []
+    for path, label, params in variants:
+        size = 0
+
+        def get():
+            nonlocal size
+            response = client.get(path, params=params, headers=headers)
+            assert response.status_code == 200, response.text
+            size = len(response.content)
+
+        stats = _support.measure(get)
+        rows.append({"path": path, "variant": label, "rows": ROWS, "kb": size / 1024, **stats})
+
+    _support.report("Payload size and latency by field selection", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark worker startup.
+
+- cold import: a fresh interpreter importing main (what every worker paid
+  without preload_app), next to the one-time bootstrap it no longer repeats
+- fork to first response: a worker forked from a preloaded master versus a
+  fresh interpreter, each timed until its first GET /products/ completes
+
+Usage: python benchmarks/bench_startup.py
+"""
+import gc
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import _support
+
+RUNS = 5
+
+FIRST_RESPONSE = """
+import asyncio, httpx
+from main import app
+async def first_response():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        assert (await client.get("/products/")).status_code == 200
+asyncio.run(first_response())
+"""
+
+
+def run_python(code: str) -> float:
+    """Seconds for a fresh interpreter (in the repo root) to run code"""
+    start = time.monotonic()
+    subprocess.run([sys.executable, "-c", code], cwd=_support.ROOT, check=True,
+                   env={**os.environ, "BOOTSTRAP_ON_STARTUP": "false"})
+    return time.monotonic() - start
+
+
+def forked_first_response() -> float:
+    """Seconds from fork() of this (preloaded) process to the child's first response"""
+    read_fd, write_fd = os.pipe()
+    start = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        exec(FIRST_RESPONSE, {})
+        os.write(write_fd, repr(time.monotonic()).encode())
+        os._exit(0)
+    os.close(write_fd)
+    done = float(os.read(read_fd, 64).decode())
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    return done - start
+
+
+def row(label: str, samples: list) -> dict:
+    return {"phase": label, "median_ms": statistics.median(samples) * 1000, "max_ms": max(samples) * 1000}
+
+
+def main():
+    bootstrap_only = [run_python("from bootstrap import bootstrap; bootstrap()") for _ in range(RUNS)]
+    cold_import = [run_python("import main") for _ in range(RUNS)]
+    fresh_first = [run_python(FIRST_RESPONSE) for _ in range(RUNS)]
+
+    # Mirror the gunicorn master: preload, bootstrap once, freeze, then fork
+    _support.load_app()
+    gc.freeze()
+    forked_first = [forked_first_response() for _ in range(RUNS)]
+
+    _support.report("Worker startup", [
+        row("bootstrap (once per deploy)", bootstrap_only),
+        row("cold import main", cold_import),
+        row("fresh interpreter -> first response", fresh_first),
+        row("fork preloaded -> first response", forked_first),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Check group commit's per-checkout isolation: when one checkout in a batch
+fails, the batch is rolled back and rerun with a savepoint per checkout. A
+second writer commits an order with items between the failed batch and its
+rerun, taking the item ids the rolled-back batch had been given. The valid
+checkout must still be committed, with ids of its own, and only the failing
+one rejected.
+
+Usage: python benchmarks/check_group_commit.py
+"""
+import asyncio
+import sys
+from functools import partial
+
+import _support
+
+
+class CheckoutFailed(Exception):
+    pass
+
+
+async def run() -> list:
+    from sqlalchemy import select
+
+    import group_commit
+    from database import AsyncSessionLocal
+    from models import Order, OrderItem, OrderStatus, Product
+    from routers.orders import write_order
+
+    async with AsyncSessionLocal() as db:
+        product = Product(name="Check Product", description="Check", price=14.0, category="gifts")
+        db.add(product)
+        await db.commit()
+        product_id = product.id
+
+    def checkout(name: str):
+        order_values = {
+            "first_name": name, "last_name": "Customer", "email": "check@example.com",
+            "shipping_address": "1 Sawdust Lane", "total": 28.0, "status": OrderStatus.NEW,
+        }
+        items = [{
+            "product_id": product_id, "product_name": "Check Product", "product_price": 14.0,
+            "quantity": 2, "selected_options": None, "custom_engraving": None,
+        }]
+        return order_values, items
+
+    async def failing(db):
+        order_values, items = checkout("Failing")
+        await write_order(db, order_values, items)
+        raise CheckoutFailed()
+
+    committer = group_commit.GroupCommitter()
+    transaction = committer._transaction
+
+    async def transaction_with_second_writer(batch, isolate):
+        try:
+            return await transaction(batch, isolate)
+        except group_commit._JobFailed:
+            # Between the rollback and the rerun, another worker commits an order with items
+            async with AsyncSessionLocal() as db:
+                order_values, items = checkout("Other worker")
+                await write_order(db, order_values, items)
+                await db.commit()
+            raise
+
+    committer._transaction = transaction_with_second_writer
+    order_values, items = checkout("Valid")
+    valid, failed = await asyncio.gather(
+        committer.submit(partial(write_order, order_values=order_values, items=items)),
+        committer.submit(failing),
+        return_exceptions=True,
+    )
+
+    results = [
+        ("the valid checkout is committed", not isinstance(valid, Exception)),
+        ("the failing checkout is rejected", isinstance(failed, CheckoutFailed)),
+        ("the caller's items are left unchanged", set(items[0]) == set(checkout("Valid")[1][0])),
+    ]
+    if not isinstance(valid, Exception):
+        (order_id, _), item_ids = valid
+        async with AsyncSessionLocal() as db:
+            stored = (await db.execute(
+                select(OrderItem.id).where(OrderItem.order_id == order_id)
+            )).scalars().all()
+            names = (await db.execute(select(Order.first_name).order_by(Order.id))).scalars().all()
+        results.append(("its items are stored under the returned ids", sorted(stored) == sorted(item_ids)))
+        results.append(("only the other worker's and the valid order exist", names == ["Other worker", "Valid"]))
+    else:
+        print(f"valid checkout raised {valid!r}")
+    return results
+
+
+def main() -> int:
+    _support.load_app()
+    results = asyncio.run(run())
+    failures = 0
+    for name, passed in results:
+        failures += not passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Measure what the Prometheus instrumentation adds to each request and fail if
+it exceeds the budget. Runs in multiprocess mode, as under gunicorn, and
+alternates rounds with METRICS_ENABLED on and off so drift affects both alike.
+
+Usage: python benchmarks/check_metrics_overhead.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import _support
+
+# Set before prometheus_client is imported, as gunicorn.conf.py does
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="timberpunk-metrics-")
+
+BUDGET_US = 100  # Added latency allowed per request, in microseconds
+ROUNDS = 10
+REQUESTS_PER_ROUND = 300
+
+
+async def request(app, path: str):
+    """One GET straight through the ASGI stack, without a network or test client"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "server": ("bench", 80), "client": ("127.0.0.1", 1), "root_path": "",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "headers": [],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    await app(scope, receive, send)
+
+
+async def per_request_us(app, path: str) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS_PER_ROUND):
+        await request(app, path)
+    return (time.perf_counter() - start) / REQUESTS_PER_ROUND * 1e6
+
+
+async def run() -> int:
+    app = _support.load_app()
+    from config import settings
+    from database import engine
+    from models import Product
+
+    with engine.begin() as conn:
+        product_id = conn.execute(Product.__table__.insert().values(
+            name="Bench Product", description="Benchmark", price=14.0, category="gifts"
+        )).inserted_primary_key[0]
+
+    rows, failures = [], 0
+    for path in ("/health", f"/products/{product_id}"):
+        samples = {True: [], False: []}
+        await per_request_us(app, path)  # warm up
+        for _ in range(ROUNDS):
+            for enabled in (False, True):
+                settings.metrics_enabled = enabled
+                samples[enabled].append(await per_request_us(app, path))
+        off, on = statistics.median(samples[False]), statistics.median(samples[True])
+        overhead = on - off
+        failures += overhead > BUDGET_US
+        rows.append({
+            "path": path, "off_us": off, "on_us": on, "overhead_us": overhead,
+            "overhead_pct": overhead / off * 100, "budget_us": BUDGET_US,
+            "result": "ok" if overhead <= BUDGET_US else "FAIL",
+        })
+
+    _support.report("Per-request cost of metrics instrumentation (median of rounds)", rows)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
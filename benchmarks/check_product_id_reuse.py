@@ -0,0 +1,55 @@
+"""
+Check that a product created after the newest one is deleted is never taken
+for it. Without AUTOINCREMENT SQLite hands the deleted product's id to the
+next one, which starts again at version 1, so anything keyed by (id, version)
+would serve the deleted product's data for it: checkout would enforce its
+options and its ETag would get a 304 for the new product.
+
+Usage: python benchmarks/check_product_id_reuse.py
+"""
+import sys
+
+import _support
+from fastapi.testclient import TestClient
+
+
+def main() -> int:
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+
+    def create(name: str, woods: str) -> int:
+        response = client.post("/products/", headers=headers, json={
+            "name": name, "description": "Check", "price": 20, "category": "gifts",
+            "options": f'{{"woods": {woods}}}',
+        })
+        return response.json()["id"]
+
+    def checkout(product_id: int, wood: str) -> int:
+        return client.post("/orders/", json={
+            "first_name": "Check", "last_name": "Customer", "email": "check@example.com",
+            "shipping_address": "1 Sawdust Lane",
+            "items": [{"product_id": product_id, "quantity": 1, "selected_options": f'{{"woods": "{wood}"}}'}],
+        }).status_code
+
+    deleted_id = create("Oak Board", '["Oak"]')
+    checkout(deleted_id, "Walnut")  # rejected, but caches the deleted product's options
+    etag = client.get(f"/products/{deleted_id}").headers["etag"]
+    client.delete(f"/products/{deleted_id}", headers=headers)
+    new_id = create("Maple Board", '["Maple"]')
+
+    results = [
+        ("the new product gets an id of its own", new_id != deleted_id),
+        ("checkout accepts the new product's options", checkout(new_id, "Maple") == 201),
+        ("checkout rejects the deleted product's options", checkout(new_id, "Oak") == 422),
+        ("the deleted product's ETag doesn't match the new product", client.get(
+            f"/products/{new_id}", headers={"If-None-Match": etag}).status_code == 200),
+    ]
+    failures = 0
+    for name, passed in results:
+        failures += not passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Exercise every route in routers/products.py, routers/orders.py and
+routers/auth_routes.py and fail if one issues more statements than its budget
+(read from the Server-Timing header) or is flagged as a likely N+1.
+The data set is large enough that a per-row query would blow the budget.
+GET /orders/export and GET /orders/stream are left out: they stream, so they query
+after their headers are sent.
+
+Usage: python benchmarks/check_query_budgets.py
+"""
+import json
+import re
+import sys
+
+import _support
+from fastapi.testclient import TestClient
+
+from config import settings
+
+ORDERS = 30
+LINES_PER_ORDER = 4
+
+
+def query_count(response) -> int:
+    timing = response.headers["server-timing"]
+    if "n-plus-one" in timing:
+        raise AssertionError(f"likely N+1: {timing}")
+    return int(re.search(r'desc="(\d+) queries"', timing).group(1))
+
+
+def main() -> int:
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+    client.get("/auth/me", headers=headers)  # warm the principal cache
+
+    product_ids = []
+    for i in range(LINES_PER_ORDER):
+        response = client.post("/products/", headers=headers, json={
+            "name": f"Budget Product {i}", "description": "Budget", "price": 10 + i, "category": "gifts",
+            "options": '{"sizes": ["12x12", "16x16"]}',
+        })
+        product_ids.append(response.json()["id"])
+    order_payload = {
+        "first_name": "Budget", "last_name": "Customer", "email": "budget@example.com",
+        "shipping_address": "1 Sawdust Lane",
+        "items": [
+            {"product_id": pid, "quantity": 1, "selected_options": '{"sizes": "16x16"}'} for pid in product_ids
+        ],
+    }
+    order_ids = [client.post("/orders/", json=order_payload).json()["id"] for _ in range(ORDERS)]
+    product_id, order_id = product_ids[0], order_ids[0]
+    etag = client.get(f"/products/{product_id}").headers["etag"]
+    bulk_body = "".join(json.dumps({
+        "sku": f"BULK-{i}", "name": f"Bulk {i}", "description": "Budget", "price": 5, "category": "gifts",
+        "options": '{"sizes": ["12x12"]}',
+    }) + "\n" for i in range(50))
+    credentials = {"email": settings.admin_email, "password": settings.admin_password}
+
+    # (description, request, max statements); product writes include republishing the catalog snapshot
+    checks = [
+        ("GET /products/", lambda: client.get("/products/"), 1),
+        ("GET /products/?category=", lambda: client.get("/products/", params={"category": "gifts"}), 1),
+        ("GET /products/?option=", lambda: client.get("/products/", params={"option": "sizes:16x16"}), 2),
+        ("GET /products/?view=summary", lambda: client.get("/products/", params={"view": "summary"}), 1),
+        ("GET /products/?fields=", lambda: client.get("/products/", params={"fields": "id,name,price"}), 2),
+        ("GET /products/search", lambda: client.get("/products/search", params={"q": "walnut"}), 1),
+        ("GET /products/{id}", lambda: client.get(f"/products/{product_id}"), 1),
+        ("GET /products/{id} (304)", lambda: client.get(f"/products/{product_id}", headers={"If-None-Match": etag}), 1),
+        ("POST /products/", lambda: client.post("/products/", headers=headers, json={
+            "name": "Budget Extra", "description": "Budget", "price": 5, "category": "gifts",
+            "options": '{"sizes": ["12x12"]}'}), 6),
+        ("PUT /products/{id}", lambda: client.put(f"/products/{product_id}", headers=headers, json={"price": 12}), 6),
+        ("PUT /products/{id} (options)", lambda: client.put(f"/products/{product_id}", headers=headers, json={
+            "options": '{"sizes": ["12x12", "16x16", "20x20"]}'}), 8),
+        ("POST /products/bulk", lambda: client.post("/products/bulk", headers={
+            **headers, "Content-Type": "application/x-ndjson"}, content=bulk_body), 7),
+        ("DELETE /products/{id}", lambda: client.delete(
+            f"/products/{client.get('/products/').json()[-1]['id']}", headers=headers), 7),
+        ("POST /orders/", lambda: client.post("/orders/", json=order_payload), 6),
+        ("GET /orders/", lambda: client.get("/orders/", headers=headers), 2),
+        ("GET /orders/?status=", lambda: client.get("/orders/", params={"status": "NEW"}, headers=headers), 2),
+        ("GET /orders/?archived=", lambda: client.get("/orders/", params={"archived": "true"}, headers=headers), 2),
+        ("GET /orders/?view=summary", lambda: client.get("/orders/", params={"view": "summary"}, headers=headers), 1),
+        ("GET /orders/?fields=", lambda: client.get(
+            "/orders/", params={"fields": "id,status,items"}, headers=headers), 2),
+        ("GET /orders/stats", lambda: client.get("/orders/stats", headers=headers), 2),
+        ("GET /orders/{id}", lambda: client.get(f"/orders/{order_id}", headers=headers), 2),
+        ("PATCH /orders/{id}", lambda: client.patch(
+            f"/orders/{order_id}", headers=headers, json={"status": "IN_PROGRESS"}), 7),
+        ("PATCH /orders/bulk", lambda: client.patch("/orders/bulk", headers=headers, json={
+            "status": "COMPLETED", "orders": [{"id": i} for i in order_ids[1:]]}), 6),
+        ("PATCH /orders/bulk (filter)", lambda: client.patch("/orders/bulk", headers=headers, json={
+            "status": "CANCELED", "filter": {"status": "NEW"}}), 7),
+        ("POST /auth/login", lambda: client.post("/auth/login", json=credentials), 1),
+        ("GET /auth/me", lambda: client.get("/auth/me", headers=headers), 0),
+    ]
+
+    failures = 0
+    for name, request, budget in checks:
+        response = request()
+        try:
+            assert response.status_code < 400, f"HTTP {response.status_code}"
+            used = query_count(response)
+            assert used <= budget, f"{used} queries"
+            print(f"ok   {name}: {used}/{budget}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"FAIL {name}: {exc} (budget {budget})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+EXPLAIN the hot read queries and fail if any of them stops using its index
+(a full table scan, or a temporary sort instead of reading in index order).
+Works on SQLite (EXPLAIN QUERY PLAN) and Postgres (EXPLAIN with seq scans
+disabled, since the planner prefers them on small tables).
+
+Usage: python benchmarks/check_query_plans.py
+"""
+import sys
+from datetime import datetime
+
+import _support
+from sqlalchemy import and_, or_, select, text
+
+from database import engine
+from migrate import upgrade_database
+from models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus, Product
+from order_archive import ARCHIVED_STATUSES
+from product_options import filter_by_options
+
+PAGE = 51
+CURSOR = (datetime(2024, 1, 1), 1000)
+
+
+def hot_queries():
+    """(name, statement, index the plan must use) for each listing query"""
+    orders_page = select(Order).order_by(Order.created_at.desc(), Order.id.desc()).limit(PAGE)
+    after_cursor = or_(
+        Order.created_at < CURSOR[0],
+        and_(Order.created_at == CURSOR[0], Order.id < CURSOR[1]),
+    )
+    return [
+        ("products by category",
+         select(Product).where(Product.category == "gifts"),
+         "ix_products_category"),
+        ("products by option values",
+         filter_by_options(select(Product), [("woods", "Walnut"), ("sizes", "16x16")]),
+         "ix_product_options_name_value"),
+        ("orders first page",
+         orders_page,
+         "ix_orders_created_at_id"),
+        ("orders page after cursor",
+         orders_page.where(after_cursor),
+         "ix_orders_created_at_id"),
+        ("orders by status",
+         orders_page.where(Order.status == OrderStatus.NEW),
+         "ix_orders_status_created_at"),
+        ("orders by status after cursor",
+         orders_page.where(Order.status == OrderStatus.NEW, after_cursor),
+         "ix_orders_status_created_at"),
+        ("items for an order page",
+         select(OrderItem).where(OrderItem.order_id.in_([1, 2, 3])),
+         "ix_order_items_order_id"),
+        ("archived orders first page",
+         select(ArchivedOrder).order_by(ArchivedOrder.created_at.desc(), ArchivedOrder.id.desc()).limit(PAGE),
+         "ix_orders_archive_created_at_id"),
+        ("items for an archived order page",
+         select(ArchivedOrderItem).where(ArchivedOrderItem.order_id.in_([1, 2, 3])),
+         "ix_order_items_archive_order_id"),
+        ("orders due for archiving",
+         select(Order.id)
+         .where(Order.status == ARCHIVED_STATUSES[0], Order.created_at < CURSOR[0])
+         .order_by(Order.created_at, Order.id).limit(500),
+         "ix_orders_status_created_at"),
+    ]
+
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return "\n".join(row[-1] for row in rows)
+    return "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}")))
+
+
+def problems(plan: str, index: str) -> list:
+    found = []
+    if index not in plan:
+        found.append(f"does not use {index}")
+    if engine.dialect.name == "sqlite":
+        if any(line.startswith("SCAN") and "USING" not in line for line in plan.splitlines()):
+            found.append("full table scan")
+        if "TEMP B-TREE" in plan:
+            found.append("sorts in a temporary b-tree")
+    else:
+        if "Seq Scan" in plan:
+            found.append("full table scan")
+        if "Sort" in plan.split("Index")[0]:
+            found.append("sorts instead of reading in index order")
+    return found
+
+
+def main() -> int:
+    upgrade_database()
+    failures = 0
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        for name, statement, index in hot_queries():
+            plan = explain(conn, statement)
+            issues = problems(plan, index)
+            print(f"{'FAIL' if issues else 'ok  '} {name}: {', '.join(issues) or index}")
+            if issues:
+                failures += 1
+                print("      " + plan.replace("\n", "\n      "))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
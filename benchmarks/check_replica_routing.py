@@ -0,0 +1,144 @@
+"""
+Check read-replica routing against a second SQLite file acting as the replica,
+kept in sync with the sqlite3 backup API the way litestream or a cron'd
+`sqlite3 .backup` would. A product inserted only into the replica shows where
+each read was served from. Checks that reads go to the replica, that a client
+reads its own writes from the primary, and that reads fall back to the primary
+while the replica lags or is missing and return once it has caught up. Also
+checks that a replica trailing steady writes by a few milliseconds, so never
+at the primary's latest position, keeps serving reads.
+
+Usage: python benchmarks/check_replica_routing.py
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import _support
+
+PRIMARY = os.environ["DATABASE_URL"].removeprefix("sqlite:///")
+REPLICA = os.path.join(os.path.dirname(PRIMARY), "replica.db")
+os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///file:{REPLICA}?mode=ro&uri=true"
+
+MARKER_ID = 999_999  # Only ever inserted into the replica
+
+STEADY_WRITES_PER_S = 100
+STEADY_REPLICA_DELAY = 0.02  # How far behind the primary the replica is applied
+STEADY_SECONDS = 3.0
+
+
+def sync_replica():
+    """Copy the primary onto the replica, then add the marker product to the copy"""
+    with sqlite3.connect(PRIMARY) as source, sqlite3.connect(REPLICA) as target:
+        source.backup(target)
+        target.execute(
+            "INSERT INTO products (id, name, description, price, category) VALUES (?, 'Replica only', '-', 1, 'gifts')",
+            (MARKER_ID,),
+        )
+
+
+def steady_writes(stop: threading.Event):
+    """Bump the catalog generation STEADY_WRITES_PER_S times a second on the primary"""
+    with sqlite3.connect(PRIMARY) as primary:
+        while not stop.is_set():
+            primary.execute("UPDATE catalog_versions SET version = version + 1")
+            primary.commit()
+            time.sleep(1 / STEADY_WRITES_PER_S)
+
+
+def trailing_replica(stop: threading.Event):
+    """Keep the replica STEADY_REPLICA_DELAY behind the primary: copy the primary
+    (plus the marker), wait, then apply the copy in one step, so the replica
+    never has the latest write"""
+    staged = os.path.join(os.path.dirname(PRIMARY), "staged.db")
+    while not stop.is_set():
+        with sqlite3.connect(PRIMARY) as source, sqlite3.connect(staged) as copy:
+            source.backup(copy)
+            copy.execute(
+                "INSERT INTO products (id, name, description, price, category) VALUES (?, 'Replica only', '-', 1, 'gifts')",
+                (MARKER_ID,),
+            )
+        time.sleep(STEADY_REPLICA_DELAY)
+        with sqlite3.connect(staged) as copy, sqlite3.connect(REPLICA) as target:
+            copy.backup(target)
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def main() -> int:
+    from fastapi.testclient import TestClient
+
+    app = _support.load_app()
+    from config import settings
+
+    settings.replica_max_lag_seconds = 0.5
+    settings.replica_check_interval_seconds = 0.1
+    headers = _support.admin_headers()
+    results = []
+
+    with TestClient(app) as client:
+        product_id = client.post("/products/", headers=headers, json={
+            "name": "Walnut Sign", "description": "Sign", "price": 20, "category": "signs",
+        }).json()["id"]
+        client.cookies.clear()
+        sync_replica()
+
+        def on_replica() -> bool:
+            return client.get(f"/products/{MARKER_ID}").status_code == 200
+
+        def on_primary() -> bool:
+            response = client.get(f"/products/{MARKER_ID}")
+            assert response.status_code in (200, 404), response.text
+            return response.status_code == 404
+
+        results.append(("reads go to the replica", wait_for(on_replica)))
+
+        client.put(f"/products/{product_id}", headers=headers, json={"price": 25})
+        sticky = "tp_read_primary" in client.cookies
+        own_write = client.get(f"/products/{product_id}").json()["price"] == 25
+        results.append(("a client reads its own writes from the primary", sticky and own_write and on_primary()))
+
+        client.cookies.clear()
+        results.append(("reads leave a replica that lags", wait_for(on_primary)))
+
+        sync_replica()
+        results.append(("reads return once the replica catches up", wait_for(on_replica)))
+
+        stop = threading.Event()
+        threads = [threading.Thread(target=steady_writes, args=(stop,)),
+                   threading.Thread(target=trailing_replica, args=(stop,))]
+        for thread in threads:
+            thread.start()
+        try:
+            deadline = time.monotonic() + STEADY_SECONDS  # Several times replica_max_lag_seconds
+            served = []
+            while time.monotonic() < deadline:
+                served.append(on_replica())
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        results.append(("reads stay on a replica trailing steady writes", all(served)))
+
+        os.remove(REPLICA)
+        results.append(("reads fall back when the replica is missing", on_primary()))
+
+    failures = 0
+    for name, passed in results:
+        failures += not passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Check that created_at bounds given with a UTC offset, in GET /orders/export
+and in PATCH /orders/bulk filters, select the same orders as the equivalent
+UTC time. SQLite stores naive UTC and would otherwise compare the bound's
+wall-clock time, hours off for any offset but +00:00.
+
+Usage: python benchmarks/check_since_filters.py
+"""
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+import _support
+from fastapi.testclient import TestClient
+
+EAST = timezone(timedelta(hours=5))
+WEST = timezone(timedelta(hours=-5))
+
+
+def main() -> int:
+    client = TestClient(_support.load_app())
+    headers = _support.admin_headers()
+
+    product_id = client.post("/products/", headers=headers, json={
+        "name": "Since Product", "description": "Check", "price": 20, "category": "gifts",
+    }).json()["id"]
+    order = client.post("/orders/", json={
+        "first_name": "Since", "last_name": "Customer", "email": "check@example.com",
+        "shipping_address": "1 Sawdust Lane", "items": [{"product_id": product_id, "quantity": 1}],
+    }).json()
+    created_at = datetime.fromisoformat(order["created_at"]).replace(tzinfo=timezone.utc)
+
+    def exported(since: datetime) -> bool:
+        response = client.get("/orders/export", headers=headers, params={"format": "ndjson", "since": since.isoformat()})
+        return any(json.loads(line)["id"] == order["id"] for line in response.text.splitlines())
+
+    def bulk_moved(since: datetime, until: datetime) -> bool:
+        response = client.patch("/orders/bulk", headers=headers, json={
+            "status": "IN_PROGRESS",
+            "filter": {"status": "NEW", "since": since.isoformat(), "until": until.isoformat()},
+        })
+        return order["id"] in response.json()["updated"]
+
+    minute_before, minute_after = created_at - timedelta(minutes=1), created_at + timedelta(minutes=1)
+    results = [
+        ("export includes an order created after since (+05:00)", exported(minute_before.astimezone(EAST))),
+        ("export excludes an order created before since (-05:00)", not exported(minute_after.astimezone(WEST))),
+        ("bulk filter leaves an order created before since (-05:00)", not bulk_moved(
+            minute_after.astimezone(WEST), created_at + timedelta(days=1))),
+        ("bulk filter moves an order between since (+05:00) and until (-05:00)", bulk_moved(
+            minute_before.astimezone(EAST), minute_after.astimezone(WEST))),
+    ]
+    failures = 0
+    for name, passed in results:
+        failures += not passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
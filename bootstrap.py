@@ -0,0 +1,25 @@
+"""
+One-time startup tasks: apply migrations, create the default admin and drop
+any catalog snapshot left over from a previous run.
+Gunicorn runs this once in the master process (see on_starting in gunicorn.conf.py)
+instead of in every worker; it can also be run by hand with `python bootstrap.py`.
+"""
+from auth import init_admin
+from catalog import discard_catalog_snapshot
+from database import SessionLocal, engine
+from migrate import upgrade_database
+
+def bootstrap():
+    """Bring the schema up to date and seed the default admin"""
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        init_admin(db)
+    finally:
+        db.close()
+    discard_catalog_snapshot()
+    # Don't let forked workers inherit the bootstrap's pooled connections
+    engine.dispose()
+
+if __name__ == "__main__":
+    bootstrap()
@@ -0,0 +1,159 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models import CatalogVersion, Product
+import schemas
+
+CATALOG = "products"
+
+async def bump_catalog_version(db: AsyncSession):
+    """Record a product write; call inside the writing transaction"""
+    await db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == CATALOG)
+        .values(version=CatalogVersion.version + 1)
+    )
+
+async def catalog_version(db: AsyncSession) -> Tuple[int, Optional[datetime]]:
+    """Current catalog generation and when it last changed"""
+    row = (await db.execute(
+        select(CatalogVersion.version, CatalogVersion.updated_at).where(CatalogVersion.name == CATALOG)
+    )).one()
+    return row.version, row.updated_at
+
+# ===== Shared catalog snapshot =====
+# The serialized product list (whole catalog plus one body per category) is
+# published to a memory-mapped file, tagged with the catalog generation. Every
+# gunicorn worker maps the same file and serves GET /products as slices of it.
+#
+# File layout: header (magic, generation, index length), JSON index of
+# {view: {category: [offset, length]}} ("" is the full list), then the bodies.
+# The views are "full" (schemas.Product) and "summary" (schemas.ProductSummary).
+
+_MAGIC = b"TPC2"
+
+VIEWS = {"full": schemas.Product, "summary": schemas.ProductSummary}
+_HEADER = struct.Struct("<4sQI")
+
+class CatalogSnapshot:
+    """A published catalog snapshot, mapped read-only"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        self._index = json.loads(self._map[_HEADER.size:_HEADER.size + index_length])
+        self._body_start = _HEADER.size + index_length
+        self._view = memoryview(self._map)
+
+    def body(self, category: Optional[str] = None, view: str = "full") -> memoryview:
+        """JSON array of the catalog, or of one category, without copying"""
+        entry = self._index[view].get(category or "")
+        if entry is None:
+            return memoryview(b"[]")
+        offset, length = entry
+        start = self._body_start + offset
+        return self._view[start:start + length]
+
+class SnapshotResponse(Response):
+    """JSON response whose body is a slice of the mapped snapshot"""
+    media_type = "application/json"
+
+    def render(self, content) -> memoryview:
+        return content
+
+_snapshot: Optional[CatalogSnapshot] = None
+
+def snapshot_path() -> str:
+    """Where the snapshot is published; shared memory when available, one file per database"""
+    if settings.catalog_snapshot_path:
+        return settings.catalog_snapshot_path
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    digest = hashlib.sha1(settings.database_url.encode()).hexdigest()[:12]
+    return os.path.join(directory, f"timberpunk-catalog-{digest}")
+
+def _dumps(value) -> bytes:
+    # Same encoding as FastAPI's JSONResponse, so snapshot bodies match the regular path byte for byte
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def _encode_snapshot(generation: int, products) -> bytes:
+    categories = sorted({product.category for product in products})
+    bodies, index, offset = [], {}, 0
+    for view, schema in VIEWS.items():
+        encoded = [
+            (product.category, _dumps(schema.model_validate(product).model_dump(mode="json")))
+            for product in products
+        ]
+        view_bodies = {"": b"[" + b",".join(body for _, body in encoded) + b"]"}
+        for category in categories:
+            view_bodies[category] = b"[" + b",".join(body for c, body in encoded if c == category) + b"]"
+        index[view] = {}
+        for key, body in view_bodies.items():
+            index[view][key] = [offset, len(body)]
+            offset += len(body)
+            bodies.append(body)
+    index_bytes = json.dumps(index).encode("utf-8")
+    return _HEADER.pack(_MAGIC, generation, len(index_bytes)) + index_bytes + b"".join(bodies)
+
+def discard_catalog_snapshot():
+    """Remove any published snapshot (it may outlive the database it was built from);
+    the next catalog read publishes a fresh one"""
+    try:
+        os.remove(snapshot_path())
+    except FileNotFoundError:
+        pass
+
+async def publish_catalog_snapshot(db: AsyncSession) -> Optional[CatalogSnapshot]:
+    """Rebuild the shared snapshot from the database. Returns None, without
+    waiting, if another worker or request is already rebuilding it."""
+    global _snapshot
+    path = snapshot_path()
+    with open(f"{path}.lock", "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        # Read the generation before the rows: a snapshot may then hold rows
+        # newer than its label (harmless), but never older ones
+        generation, _ = await catalog_version(db)
+        products = (await db.scalars(select(Product).order_by(Product.id))).all()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_encode_snapshot(generation, products))
+        os.replace(tmp_path, path)
+    _snapshot = CatalogSnapshot(path)
+    return _snapshot
+
+async def catalog_body(
+    db: AsyncSession, generation: int, category: Optional[str], view: str = "full"
+) -> Optional[memoryview]:
+    """Serialized product list for the given catalog generation, from the shared
+    snapshot. Returns None when no up-to-date snapshot can be had right now."""
+    global _snapshot
+    if _snapshot is None or _snapshot.generation != generation:
+        # Another worker may already have published this generation
+        try:
+            # Old maps are left to the GC; responses may still hold slices of them
+            _snapshot = CatalogSnapshot(snapshot_path())
+        except (OSError, ValueError):
+            _snapshot = None
+        if _snapshot is not None and _snapshot.generation > generation:
+            # db is a replica that hasn't caught up: don't replace the newer snapshot with older rows
+            return None
+        if _snapshot is None or _snapshot.generation != generation:
+            await publish_catalog_snapshot(db)
+        if _snapshot is None or _snapshot.generation != generation:
+            return None
+    return _snapshot.body(category, view)
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime], cache_control: str) -> dict:
+    """ETag / Last-Modified / Cache-Control headers for a representation version"""
+    headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_conditional(request: Request) -> bool:
+    """Whether the client sent a validator worth checking before loading the body"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    """Evaluate If-None-Match (or, without it, If-Modified-Since) per RFC 9110"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return headers["ETag"] in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= _as_utc(since)
+    return False
+
+
+def not_modified(headers: dict) -> Response:
+    """An empty 304 carrying the current validators"""
+    return Response(status_code=304, headers=headers)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; CURRENT_TIMESTAMP is UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
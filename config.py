@@ -1,13 +1,58 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # Database
     database_url: str
     
+    # Read replicas for read-only routes (comma-separated URLs); writes always go to database_url
+    database_replica_urls: str = ""
+    replica_max_lag_seconds: float = 2.0  # A replica behind the primary for longer than this serves no reads
+    replica_check_interval_seconds: float = 1.0  # How often each worker compares replica and primary positions
+    replica_sticky_seconds: int = 5  # After a write, that client reads from the primary for this long
+    
+    # SQLite engine profile (applied to every new connection)
+    sqlite_journal_mode: str = "WAL"  # Readers no longer wait on writers
+    sqlite_synchronous: str = "NORMAL"  # Safe with WAL; fsync at checkpoints only
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268435456
+    sqlite_pool_size: int = 8  # Request-path connections each worker keeps open, with their cache (file databases)
+    sqlite_max_overflow: int = 24  # Extra connections opened under load, closed when returned
+    
+    # Postgres pool profile; sizes default to db_max_connections split across workers
+    web_concurrency: int = 4  # Gunicorn workers, see gunicorn.conf.py
+    db_max_connections: int = 80  # Connections the whole deployment may hold
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_timeout_seconds: int = 10
+    db_pool_pre_ping: bool = True
+    db_pool_recycle_seconds: int = 1800
+    
     # Security
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_cache_size: int = 1024
+    auth_cache_ttl_seconds: int = 300  # Bounds how stale a cached admin can be in other workers
+    
+    # Password hashing
+    bcrypt_rounds: int = 12  # Existing hashes are upgraded to this cost on next login
+    password_hash_workers: int = 2  # Processes per API worker
+    password_hash_max_pending: int = 8  # Beyond this, logins are rejected with 503
+    
+    # Admission control on POST /orders ("checkout") and POST /auth/login ("login"), shared by
+    # every worker on the host. Past the concurrency limit requests get 503, past the rate
+    # limit (a token bucket; 0 turns it off) 429, both straight away and with Retry-After
+    admission_control: bool = True
+    admission_state_path: Optional[str] = None  # Defaults to /dev/shm, one file per database
+    admission_retry_after_seconds: int = 1  # Suggested to clients turned away by a concurrency limit or a busy hasher
+    checkout_max_concurrency: int = 32
+    checkout_rate_per_second: float = 100.0
+    checkout_burst: int = 200
+    login_max_concurrency: int = 8
+    login_rate_per_second: float = 5.0
+    login_burst: int = 20
     
     # Admin credentials
     admin_email: str
@@ -16,6 +61,65 @@ class Settings(BaseSettings):
     # CORS
     frontend_url: str
     
+    # Startup
+    bootstrap_on_startup: bool = True  # Run migrations and admin seeding when the app starts
+    
+    # SQL instrumentation
+    sql_server_timing: bool = True  # Report per-request query count and DB time in Server-Timing
+    sql_n_plus_one_threshold: int = 5  # Identical SELECTs per request before logging a likely N+1
+    
+    # Prometheus metrics (GET /metrics)
+    metrics_enabled: bool = True
+    
+    # HTTP caching
+    catalog_cache_max_age_seconds: int = 30  # How long browsers/nginx may reuse catalog reads unchecked
+    
+    # Catalog snapshot shared by all workers (defaults to /dev/shm, one file per database)
+    catalog_snapshot_enabled: bool = True
+    catalog_snapshot_path: Optional[str] = None
+    
+    # Product search
+    search_default_limit: int = 20
+    search_max_limit: int = 100
+    
+    # Bulk product import
+    product_import_batch_size: int = 1000  # Rows per upsert executemany
+    
+    # Product options
+    product_options_cache_size: int = 4096  # Parsed option sets kept per worker, keyed by product version
+    product_options_cache_ttl_seconds: int = 3600
+    
+    # Checkout group commit: each worker writes the checkouts arriving within the window in
+    # one transaction, so a burst takes the SQLite write lock once per batch, not per order
+    checkout_group_commit: bool = False
+    checkout_group_commit_window_ms: float = 2.0  # Longest a checkout waits for others to join its batch
+    checkout_group_commit_max_batch: int = 64  # A batch this full is written without waiting out the window
+    
+    # Serialize GET /products (when not served from the snapshot) and GET /orders from column
+    # tuples straight to JSON bytes, skipping ORM loading and response-model validation
+    fast_serialization: bool = False
+    
+    # Order archive (python order_archive.py): completed and canceled orders placed more than
+    # this many days ago move to orders_archive, in batches each committed on its own
+    order_archive_after_days: int = 180
+    order_archive_batch_size: int = 500
+    
+    # Pagination
+    orders_page_size: int = 50
+    orders_max_page_size: int = 200
+    orders_bulk_max: int = 1000  # Most orders one PATCH /orders/bulk may change
+    
+    # Order export
+    export_batch_size: int = 1000  # Rows fetched from the server-side cursor per chunk
+    
+    # Live order feed (GET /orders/stream)
+    order_events_poll_interval_seconds: float = 1.0  # How often each worker checks for new events (SQLite; fallback on Postgres)
+    order_events_keepalive_seconds: float = 15.0  # Comment sent on idle streams; keep below the proxy read timeout
+    order_events_retry_ms: int = 3000  # Reconnect delay suggested to EventSource clients
+    order_events_retention_hours: int = 24  # Older events are pruned; clients resuming from them get a reset
+    order_events_replay_limit: int = 1000  # Most events replayed on resume before sending a reset instead
+    order_events_queue_size: int = 1000  # Events buffered per stream before a slow client is disconnected
+    
     class Config:
         env_file = ".env"
 
@@ -1,11 +1,169 @@
-from sqlalchemy import create_engine
+import os
+from typing import Optional
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from metrics import timed_pool
 
-engine = create_engine(settings.database_url)
+# Async drivers used for the request path, keyed by the sync dialect in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Connections per worker reserved for the sync engine (startup tasks and scripts)
+SYNC_ENGINE_CONNECTIONS = 2
+
+def async_database_url(url: str) -> str:
+    """Translate a sync database URL to its asyncio driver equivalent"""
+    sa_url = make_url(url)
+    driver = ASYNC_DRIVERS.get(sa_url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {sa_url.drivername}")
+    return sa_url.set(drivername=driver).render_as_string(hide_password=False)
+
+def sqlite_pragmas() -> list:
+    """PRAGMA statements run on every new SQLite connection"""
+    return [
+        f"journal_mode={settings.sqlite_journal_mode}",
+        f"synchronous={settings.sqlite_synchronous}",
+        f"busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"cache_size=-{settings.sqlite_cache_size_kib}",
+        f"mmap_size={settings.sqlite_mmap_size}",
+    ]
+
+def postgres_pool_options(connections: int, pool_size: Optional[int] = None, max_overflow: Optional[int] = None) -> dict:
+    """Pool settings for an engine allowed to hold `connections` connections"""
+    if pool_size is None:
+        pool_size = max(1, connections // 2)
+    if max_overflow is None:
+        max_overflow = max(0, connections - pool_size)
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
+def default_pool_class(url: str) -> type:
+    """The pool class create_engine would pick for url (e.g. NullPool for aiosqlite)"""
+    sa_url = make_url(url)
+    return sa_url.get_dialect().get_pool_class(sa_url)
+
+def is_sqlite_file(url: str) -> bool:
+    """Whether url is a SQLite database on disk (not in memory)"""
+    sa_url = make_url(url)
+    return (
+        sa_url.get_backend_name() == "sqlite"
+        and sa_url.database not in (None, "", ":memory:")
+        and sa_url.query.get("mode") != "memory"
+    )
+
+def request_pool_class(url: str) -> type:
+    """Pool class for a request engine. aiosqlite defaults to NullPool even for files,
+    which would open a connection (and rerun the PRAGMAs) per request and throw away
+    its page cache and mmap when the request ends; file databases get a real pool."""
+    if is_sqlite_file(url):
+        return AsyncAdaptedQueuePool
+    return default_pool_class(async_database_url(url))
+
+def engine_options(url: str, sync: bool = False) -> dict:
+    """create_engine keyword arguments for the backend in url"""
+    if make_url(url).get_backend_name() == "sqlite":
+        if sync or not is_sqlite_file(url):
+            return {}
+        return {
+            "pool_size": settings.sqlite_pool_size,
+            "max_overflow": settings.sqlite_max_overflow,
+            "pool_timeout": settings.db_pool_timeout_seconds,
+        }
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    if sync:
+        return postgres_pool_options(SYNC_ENGINE_CONNECTIONS, pool_size=1)
+    per_worker = max(1, settings.db_max_connections // settings.web_concurrency)
+    return postgres_pool_options(
+        max(1, per_worker - SYNC_ENGINE_CONNECTIONS),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
+
+def _aiosqlite_daemon_thread(dialect, connection_record, cargs, cparams):
+    """Connect through aiosqlite with its worker thread marked daemon (do_connect event).
+    SQLAlchemy tries to, but since aiosqlite 0.22 the thread is no longer the connection
+    object itself; pooled idle connections would otherwise keep the process from exiting."""
+    import aiosqlite
+
+    def connect(*args, **kwargs):
+        connection = aiosqlite.connect(*args, **kwargs)
+        getattr(connection, "_thread", connection).daemon = True
+        return connection
+
+    cparams["async_creator_fn"] = connect
+
+def _file_identity(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+def _discard_if_file_replaced(path: str):
+    """connect/checkout listeners that drop a pooled SQLite connection once path no
+    longer names the file it opened (deleted, or replaced by a restore or copy);
+    it would otherwise keep reading the old file"""
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["file"] = _file_identity(path)
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        if _file_identity(path) != connection_record.info.get("file"):
+            raise exc.DisconnectionError(f"{path} was replaced")
+
+    return on_connect, on_checkout
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in sqlite_pragmas():
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+# Sync engine for startup tasks and scripts
+engine = create_engine(
+    settings.database_url,
+    poolclass=timed_pool(default_pool_class(settings.database_url), "sync"),
+    **engine_options(settings.database_url, sync=True)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def create_request_engine(url: str, pool_name: str):
+    """Async engine for request handlers, so DB waits don't block the event loop
+    (the primary, and any read replicas)"""
+    request_engine = create_async_engine(
+        async_database_url(url),
+        poolclass=timed_pool(request_pool_class(url), pool_name),
+        **engine_options(url)
+    )
+    if request_engine.dialect.name == "sqlite":
+        event.listen(request_engine.sync_engine, "do_connect", _aiosqlite_daemon_thread)
+        event.listen(request_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    if is_sqlite_file(url):
+        path = make_url(url).database.removeprefix("file:")
+        on_connect, on_checkout = _discard_if_file_replaced(path)
+        event.listen(request_engine.sync_engine, "connect", on_connect)
+        event.listen(request_engine.sync_engine, "checkout", on_checkout)
+    return request_engine
+
+async_engine = create_request_engine(settings.database_url, "async")
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
 Base = declarative_base()
 
 def get_db():
@@ -15,3 +173,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,105 @@
+"""
+Opt-in fast path (FAST_SERIALIZATION) for the large list endpoints.
+Normally a list of ORM objects is validated into the response model and then
+encoded by FastAPI. Here the rows are selected as plain column tuples, in the
+response schema's field order, and encoded straight to bytes with Pydantic's
+serializer, the one FastAPI itself uses to turn response models into JSON
+data. The body is byte-for-byte what the regular path produces.
+
+Sparse fieldsets (?fields=name,price or ?view=summary) always take this path,
+because a partial row can't be validated into the full response model; only
+the requested columns are selected.
+"""
+import json
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Type
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import OrderItem, Product
+import schemas
+
+_json = TypeAdapter(Any)
+
+def schema_columns(schema: Type[BaseModel], model) -> list:
+    """The model's columns for every field of schema, in the schema's field order"""
+    table_columns = model.__table__.c
+    return [table_columns[name] for name in schema.model_fields if name in table_columns]
+
+PRODUCT_COLUMNS = schema_columns(schemas.Product, Product)
+
+def columns(model, names: List[str]) -> list:
+    table_columns = model.__table__.c
+    return [table_columns[name] for name in names]
+
+def requested_fields(
+    schema: Type[BaseModel], summary: Type[BaseModel], fields: Optional[str], view: str
+) -> Optional[List[str]]:
+    """Field names asked for with ?fields= (in schema order) or ?view=summary; None for
+    the full representation. Raises ValueError for unknown fields."""
+    if fields is None:
+        return list(summary.model_fields) if view == "summary" else None
+    if view != "full":
+        raise ValueError("Pass either fields or view, not both")
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    if not names:
+        raise ValueError("fields must name at least one field")
+    unknown = names - schema.model_fields.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in schema.model_fields if name in names]
+
+def _plain(value: Optional[float]) -> bool:
+    # Pydantic and json.dumps only disagree on floats written in exponent notation
+    # ("1e16" vs "1e+16"); NaN and infinity fail both checks, so they error as usual
+    return value is None or value == 0 or 1e-4 <= abs(value) < 1e16
+
+def encode(content: Any, floats: Iterable[Optional[float]] = ()) -> bytes:
+    """content as FastAPI's JSONResponse would encode it; floats are every float in it"""
+    if all(_plain(value) for value in floats):
+        return _json.dump_json(content)
+    return json.dumps(
+        _json.dump_python(content, mode="json"), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+async def product_list_response(db: AsyncSession, query, headers: Dict[str, str]) -> Response:
+    """GET /products body for a query selecting PRODUCT_COLUMNS or the requested fields"""
+    products = [row._asdict() for row in await db.execute(query)]
+    body = encode(products, (product.get("price") for product in products))
+    return Response(body, media_type="application/json", headers=headers)
+
+async def order_page_response(
+    db: AsyncSession,
+    rows: List,
+    next_cursor: Optional[str],
+    fields: Optional[List[str]] = None,
+    item_model=OrderItem,
+) -> Response:
+    """GET /orders body for a page of rows selecting schema_columns(schemas.Order, ...), or the
+    requested fields plus id and created_at for the cursor. Items are loaded from item_model
+    in one query, as selectinload would."""
+    fields = fields or list(schemas.Order.model_fields)
+    orders = []
+    for row in rows:
+        values = row._asdict()
+        orders.append({name: values[name] for name in fields if name != "items"})
+    if "items" in fields:
+        by_id = {}
+        for row, order in zip(rows, orders):
+            order["items"] = []
+            by_id[row.id] = order
+        if by_id:
+            items = await db.execute(
+                select(*schema_columns(schemas.OrderItem, item_model))
+                .where(item_model.order_id.in_(list(by_id)))
+                .order_by(item_model.order_id, item_model.id)
+            )
+            for item in items:
+                by_id[item.order_id]["items"].append(item._asdict())
+    floats = chain(
+        (order.get("total") for order in orders),
+        (item["product_price"] for order in orders for item in order.get("items", ())),
+    )
+    body = encode({"items": orders, "next_cursor": next_cursor}, floats)
+    return Response(body, media_type="application/json")
@@ -0,0 +1,118 @@
+"""
+Group commit for checkout writes (CHECKOUT_GROUP_COMMIT).
+On SQLite every checkout takes the database write lock for its own
+transaction, and under a burst the workers spend their time waiting on each
+other's locks. With group commit each worker gathers the checkouts that
+arrive within checkout_group_commit_window_ms and writes them in one
+transaction. If a checkout fails, the batch is rolled back and rerun with
+each order in its own SAVEPOINT, so only the failing one is rejected and
+the rest are committed. Nothing is acknowledged until the shared
+transaction has committed.
+"""
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Callable, List, Optional, TypeVar
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from metrics import record_group_commit
+
+T = TypeVar("T")
+
+Job = Callable[[AsyncSession], Awaitable[T]]
+
+class _JobFailed(Exception):
+    """A job raised during an optimistic batch without savepoints"""
+
+class _Pending:
+    __slots__ = ("job", "future", "submitted", "duration")
+
+    def __init__(self, job: Job, future: asyncio.Future):
+        self.job, self.future = job, future
+        self.submitted = time.perf_counter()
+        self.duration = 0.0  # Time spent running this job's own statements
+
+class GroupCommitter:
+    """Batches write jobs from concurrent requests into shared transactions"""
+
+    def __init__(self):
+        self._pending: List[_Pending] = []
+        self._task: Optional[asyncio.Task] = None
+        self._full: Optional[asyncio.Event] = None
+
+    async def submit(self, job: Job) -> T:
+        """Run job(db) in the next batch and return its result once the batch has committed.
+        Raises whatever the job raised, or the commit error if the whole batch failed."""
+        pending = _Pending(job, asyncio.get_running_loop().create_future())
+        self._pending.append(pending)
+        if self._task is None or self._task.done():
+            self._full = asyncio.Event()
+            # Fresh context: the batch's statements shouldn't count towards this request's Server-Timing
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+        if len(self._pending) >= settings.checkout_group_commit_max_batch:
+            self._full.set()
+        return await pending.future
+
+    async def _run(self):
+        try:
+            await asyncio.wait_for(self._full.wait(), settings.checkout_group_commit_window_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        # Checkouts that arrive while a batch is writing have already waited; take them straight away
+        while self._pending:
+            batch_size = settings.checkout_group_commit_max_batch
+            batch, self._pending = self._pending[:batch_size], self._pending[batch_size:]
+            await self._write(batch)
+
+    async def _write(self, batch: List[_Pending]):
+        batch = [pending for pending in batch if not pending.future.done()]  # Skip cancelled requests
+        if not batch:
+            return
+        try:
+            try:
+                outcomes = await self._transaction(batch, isolate=False)
+            except _JobFailed:
+                # Rare, since checkouts are validated first: redo the batch with a
+                # savepoint per checkout so only the failing ones are rejected
+                outcomes = await self._transaction(batch, isolate=True)
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        committed = time.perf_counter()
+        record_group_commit(len(batch), [committed - p.submitted - p.duration for p in batch])
+        for pending, (result, error) in zip(batch, outcomes):
+            if pending.future.done():
+                continue
+            if error is not None:
+                pending.future.set_exception(error)
+            else:
+                pending.future.set_result(result)
+
+    async def _transaction(self, batch: List[_Pending], isolate: bool) -> List[tuple]:
+        """Run every job in one transaction and commit; (result, error) per job"""
+        outcomes = []
+        async with AsyncSessionLocal() as db:
+            if db.bind.dialect.name == "sqlite":
+                # Take the write lock once, up front, and keep any savepoints inside one transaction
+                await db.execute(text("BEGIN IMMEDIATE"))
+            for pending in batch:
+                started = time.perf_counter()
+                try:
+                    if isolate:
+                        async with db.begin_nested():
+                            outcomes.append((await pending.job(db), None))
+                    else:
+                        outcomes.append((await pending.job(db), None))
+                except Exception as e:
+                    if not isolate:
+                        raise _JobFailed() from e
+                    outcomes.append((None, e))
+                pending.duration = time.perf_counter() - started
+            await db.commit()
+        return outcomes
+
+checkout_commits = GroupCommitter()
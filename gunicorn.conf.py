@@ -1,7 +1,24 @@
 # Gunicorn configuration file for TimberPunk API
+import gc
+import os
+import shutil
+import tempfile
 
-# Number of worker processes
-workers = 4
+# Migrations and admin seeding run once in on_starting below, not in each worker
+os.environ.setdefault("BOOTSTRAP_ON_STARTUP", "false")
+
+# Workers write Prometheus samples to files in this directory, so a scrape of any
+# worker reports the totals of all of them. One directory per master, set before
+# the app (and prometheus_client) is imported.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), f"timberpunk-metrics-{os.getpid()}"),
+)
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+# Number of worker processes (the app sizes its Postgres pool from the same variable)
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
 
 # Worker class - uvicorn for async support
 worker_class = "uvicorn.workers.UvicornWorker"
@@ -26,3 +43,22 @@ graceful_timeout = 30
 # Maximum requests per worker before restart (prevents memory leaks)
 max_requests = 1000
 max_requests_jitter = 50
+
+# Import the app once in the master so workers (including ones recycled by
+# max_requests) fork from a process that has already loaded it
+preload_app = os.environ.get("PRELOAD_APP", "true").lower() == "true"
+
+def on_starting(server):
+    """Run one-time bootstrap in the master before any worker is forked"""
+    from bootstrap import bootstrap
+    bootstrap()
+    # Keep the preloaded objects out of the collector so forks share their pages
+    gc.freeze()
+
+def child_exit(server, worker):
+    """Stop counting a dead worker's in-flight requests and pool connections"""
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
+def on_exit(server):
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
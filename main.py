@@ -1,17 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, SessionLocal, Base
+from sqlalchemy.orm import configure_mappers
 from routers import products, orders, auth_routes
-from auth import init_admin
+from bootstrap import bootstrap
 from config import settings
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Initialize default admin
-db = SessionLocal()
-init_admin(db)
-db.close()
+from database import engine, async_engine
+from metrics import MetricsMiddleware, render_metrics
+from passwords import shutdown_executor
+from query_stats import QueryStatsMiddleware, instrument
+from replicas import ReadYourWritesMiddleware, read_router
 
 app = FastAPI(
     title="TimberPunk API",
@@ -28,11 +25,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query count / DB time (Server-Timing) and N+1 warnings
+instrument(engine, async_engine.sync_engine, *(replica.engine.sync_engine for replica in read_router.replicas))
+app.add_middleware(QueryStatsMiddleware)
+
+# Keep clients that just wrote on the primary for their next reads (with read replicas)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Request latency / in-flight / status metrics; added last so it also times the other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_routes.router)
 app.include_router(products.router)
 app.include_router(orders.router)
 
+# Resolve ORM mappers now, so gunicorn workers forked from a preloaded app start warm
+configure_mappers()
+
+@app.on_event("startup")
+def run_bootstrap():
+    # Gunicorn bootstraps once in the master and turns this off for its workers
+    if settings.bootstrap_on_startup:
+        bootstrap()
+
+@app.on_event("shutdown")
+def stop_password_executor():
+    shutdown_executor()
+
+@app.on_event("shutdown")
+async def close_request_pools():
+    for request_engine in (async_engine, *(replica.engine for replica in read_router.replicas)):
+        await request_engine.dispose()
+
 @app.get("/")
 def root():
     return {
@@ -41,6 +66,12 @@ def root():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint, aggregated across gunicorn workers"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
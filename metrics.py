@@ -0,0 +1,190 @@
+"""
+Prometheus metrics for GET /metrics.
+Under gunicorn every worker writes its samples to memory-mapped files in
+PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and a scrape of any
+worker aggregates all of them. Without that variable, as under a single
+uvicorn process, the default in-process registry is used.
+"""
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from config import settings
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# ===== HTTP =====
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to handle a request, by route template",
+    ["method", "route"],
+)
+RESPONSES = Counter(
+    "http_responses_total", "Responses sent, by route template and status code",
+    ["method", "route", "status"],
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled right now",
+    ["method"], multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests refused by admission control, by limit and reason",
+    ["limit", "reason"],  # reason: concurrency (503) or rate (429)
+)
+
+# ===== Database pools =====
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool",
+    ["engine"], multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond the pool size",
+    ["engine"], multiprocess_mode="livesum",
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    ["engine"], buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up waiting for a connection",
+    ["engine"],
+)
+
+READ_SESSIONS = Counter(
+    "db_read_sessions_total", "Sessions for read-only routes, by where they were sent",
+    ["target"],  # replica, primary_sticky (client just wrote), primary_fallback (no usable replica)
+)
+REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds", "How long a replica has been behind the primary, 0 when caught up",
+    ["replica"], multiprocess_mode="max",
+)
+
+# ===== Orders =====
+CHECKOUTS = Counter("checkouts_total", "Checkout attempts, by outcome", ["outcome"])
+ORDERED_UNITS = Counter("ordered_units_total", "Units sold through checkout")
+ORDER_REVENUE = Counter("order_revenue_total", "Order totals placed through checkout")
+ORDER_STATUS_CHANGES = Counter("order_status_changes_total", "Order status updates, by new status", ["status"])
+
+GROUP_COMMIT_BATCH = Histogram(
+    "checkout_group_commit_batch_size", "Checkouts written per group-commit transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+GROUP_COMMIT_DELAY = Histogram(
+    "checkout_group_commit_added_seconds", "Time a checkout spent waiting on its batch, beyond its own writes",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+def record_checkout(outcome: str, units: int = 0, revenue: float = 0.0):
+    """Count a checkout attempt; outcome is "created" or the reason it was rejected"""
+    CHECKOUTS.labels(outcome).inc()
+    if units:
+        ORDERED_UNITS.inc(units)
+        ORDER_REVENUE.inc(revenue)
+
+def record_status_change(status: str, orders: int = 1):
+    ORDER_STATUS_CHANGES.labels(status).inc(orders)
+
+def record_group_commit(batch_size: int, added_seconds: list):
+    GROUP_COMMIT_BATCH.observe(batch_size)
+    for seconds in added_seconds:
+        GROUP_COMMIT_DELAY.observe(seconds)
+
+def record_admission_rejected(limit: str, reason: str):
+    ADMISSION_REJECTED.labels(limit, reason).inc()
+
+def record_read_session(target: str):
+    READ_SESSIONS.labels(target).inc()
+
+def record_replica_lag(replica: str, seconds: float):
+    REPLICA_LAG.labels(replica).set(seconds)
+
+def timed_pool(pool_class, engine_name: str):
+    """Subclass of a SQLAlchemy pool class that reports checkout waits and pool occupancy"""
+    wait, timeouts = POOL_WAIT.labels(engine_name), POOL_TIMEOUTS.labels(engine_name)
+    checked_out, overflow = POOL_CHECKED_OUT.labels(engine_name), POOL_OVERFLOW.labels(engine_name)
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeout:
+                timeouts.inc()
+                raise
+            finally:
+                wait.observe(time.perf_counter() - started)
+            checked_out.inc()
+            self._report_overflow()
+            return connection
+
+        def _do_return_conn(self, record):
+            checked_out.dec()
+            super()._do_return_conn(record)
+            self._report_overflow()
+
+        def _report_overflow(self):
+            # Only QueuePool has a size to overflow; NullPool (aiosqlite) opens a connection per checkout
+            if hasattr(self, "overflow"):
+                overflow.set(max(0, self.overflow()))
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+class MetricsMiddleware:
+    """Time every HTTP request and count responses per route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = {}  # endpoint -> route template, filled lazily
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"  # Raw paths would give every 404 its own series
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = next(
+                (r.path for r in scope["app"].routes if getattr(r, "endpoint", None) is endpoint), "unmatched"
+            )
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        in_progress = IN_PROGRESS.labels(method)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            in_progress.dec()
+            route = self._route(scope)
+            REQUEST_DURATION.labels(method, route).observe(duration)
+            RESPONSES.labels(method, route, str(status_code)).inc()
+
+def render_metrics() -> tuple:
+    """(body, content type) for a scrape, aggregated over every worker when multiprocess"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid: int):
+    """Drop a dead worker's live gauges (gunicorn child_exit hook)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
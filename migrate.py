@@ -0,0 +1,23 @@
+"""
+Apply database migrations.
+Run `python migrate.py` (or `alembic upgrade head`) after pulling schema changes.
+"""
+import os
+from alembic import command
+from alembic.config import Config
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def alembic_config() -> Config:
+    """Alembic config that works regardless of the current directory"""
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+    config.attributes["configure_logger"] = False
+    return config
+
+def upgrade_database():
+    """Bring the schema up to the latest migration"""
+    command.upgrade(alembic_config(), "head")
+
+if __name__ == "__main__":
+    upgrade_database()
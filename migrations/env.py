@@ -0,0 +1,52 @@
+from logging.config import fileConfig
+from alembic import context
+from database import Base, engine
+import models  # noqa: F401  (registers tables on Base.metadata)
+
+config = context.config
+
+# Leave the application's logging alone when migrations run in-process
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Search index objects are maintained by hand in migrations, not mirrored in models.py
+SEARCH_OBJECTS = ("products_fts", "search_vector", "ix_products_search_vector")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (reflected and compare_to is None and name and name.startswith(SEARCH_OBJECTS))
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL without connecting to the database"""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the application's sync engine"""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,101 @@
+"""Initial schema
+
+Matches the tables previously created by Base.metadata.create_all, so it is a
+no-op for databases that predate migrations and only needs to record itself.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "products" not in existing:
+        op.create_table(
+            "products",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("short_description", sa.String(), nullable=True),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("category", sa.String(), nullable=False),
+            sa.Column("image_url", sa.String(), nullable=True),
+            sa.Column("options", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_products_id", "products", ["id"])
+
+    if "orders" not in existing:
+        op.create_table(
+            "orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("first_name", sa.String(), nullable=False),
+            sa.Column("last_name", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("phone", sa.String(), nullable=True),
+            sa.Column("shipping_address", sa.Text(), nullable=False),
+            sa.Column("note", sa.Text(), nullable=True),
+            sa.Column(
+                "status",
+                sa.Enum("NEW", "IN_PROGRESS", "COMPLETED", "CANCELED", name="orderstatus"),
+                nullable=False,
+            ),
+            sa.Column("total", sa.Float(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_orders_id", "orders", ["id"])
+
+    if "order_items" not in existing:
+        op.create_table(
+            "order_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("product_name", sa.String(), nullable=False),
+            sa.Column("product_price", sa.Float(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("selected_options", sa.Text(), nullable=True),
+            sa.Column("custom_engraving", sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"]),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_order_items_id", "order_items", ["id"])
+
+    if "admins" not in existing:
+        op.create_table(
+            "admins",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_admins_email", "admins", ["email"], unique=True)
+        op.create_index("ix_admins_id", "admins", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("admins")
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("products")
+    sa.Enum(name="orderstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,39 @@
+"""Indexes for catalog filtering, order listing and order item lookups
+
+ix_orders_created_at_id and ix_order_items_order_id may already exist on
+databases created by create_all after keyset pagination was added.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /products?category=
+    op.create_index("ix_products_category", "products", ["category"], if_not_exists=True)
+    # GET /orders, newest first, with and without ?status=
+    op.create_index("ix_orders_created_at_id", "orders", ["created_at", "id"], if_not_exists=True)
+    op.create_index("ix_orders_status_created_at", "orders", ["status", "created_at", "id"], if_not_exists=True)
+    # Batch-loading items per order page, and order items per product
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"], if_not_exists=True)
+    op.create_index("ix_order_items_product_id", "order_items", ["product_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_items_product_id", table_name="order_items")
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_orders_status_created_at", table_name="orders")
+    op.drop_index("ix_orders_created_at_id", table_name="orders")
+    op.drop_index("ix_products_category", table_name="products")
@@ -0,0 +1,42 @@
+"""Version stamps for conditional requests
+
+Adds a per-row version to products and orders and a catalog-wide generation
+counter, so ETags can be computed without loading the response body.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("products", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column("orders", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    catalog_versions = op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(catalog_versions, [{"name": "products", "version": 1}])
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_versions")
+    with op.batch_alter_table("orders") as batch_op:
+        batch_op.drop_column("version")
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,77 @@
+"""Full-text search over product name, short description and description
+
+SQLite: an FTS5 index (products_fts) kept in sync with products by triggers.
+Postgres: a generated, weighted tsvector column with a GIN index.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FTS_COLUMNS = "name, short_description, description"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("""
+            ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(short_description, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_products_search_vector ON products USING GIN (search_vector)")
+        return
+
+    op.execute(f"""
+        CREATE VIRTUAL TABLE products_fts USING fts5(
+            {FTS_COLUMNS},
+            content='products', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute(f"""
+        CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.name, new.short_description, new.description);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.name, old.short_description, old.description);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER products_fts_update AFTER UPDATE OF {FTS_COLUMNS} ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.name, old.short_description, old.description);
+            INSERT INTO products_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.name, new.short_description, new.description);
+        END
+    """)
+    # Index the products that already exist
+    op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_products_search_vector")
+        op.execute("ALTER TABLE products DROP COLUMN search_vector")
+        return
+
+    op.execute("DROP TRIGGER products_fts_update")
+    op.execute("DROP TRIGGER products_fts_delete")
+    op.execute("DROP TRIGGER products_fts_insert")
+    op.execute("DROP TABLE products_fts")
@@ -0,0 +1,66 @@
+"""Structured product options
+
+Mirrors every name/value pair of products.options (JSON text) into a
+product_options table indexed for "products offering name=value" lookups,
+and backfills it from the existing products.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:04
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def option_rows(product_id, text):
+    """Rows for one product's options text; anything malformed is skipped"""
+    try:
+        options = json.loads(text) if text else {}
+    except ValueError:
+        return []
+    if not isinstance(options, dict):
+        return []
+    rows = []
+    for name, values in options.items():
+        if not isinstance(values, list):
+            continue
+        values = [value for value in values if isinstance(value, str)]
+        for position, value in enumerate(dict.fromkeys(values)):
+            rows.append({"product_id": product_id, "name": name, "value": value, "position": position})
+    return rows
+
+
+def upgrade() -> None:
+    product_options = op.create_table(
+        "product_options",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("product_id", "name", "value", name="uq_product_options_product_name_value"),
+    )
+    op.create_index("ix_product_options_name_value", "product_options", ["name", "value", "product_id"])
+
+    products = op.get_bind().execute(sa.text("SELECT id, options FROM products WHERE options IS NOT NULL"))
+    rows = [row for product_id, text in products for row in option_rows(product_id, text)]
+    if rows:
+        op.bulk_insert(product_options, rows)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_options_name_value", table_name="product_options")
+    op.drop_table("product_options")
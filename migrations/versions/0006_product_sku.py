@@ -0,0 +1,31 @@
+"""Product SKUs
+
+Adds a nullable, unique sku to products; bulk imports upsert on it.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("products", sa.Column("sku", sa.String(), nullable=True))
+    op.create_index("ix_products_sku", "products", ["sku"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_sku", table_name="products")
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.drop_column("sku")
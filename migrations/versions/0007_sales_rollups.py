@@ -0,0 +1,67 @@
+"""Sales rollups
+
+Per-day totals for the admin dashboard: orders and revenue per status, and
+units and revenue per status and product. Backfilled from the existing orders.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The orderstatus type already exists on Postgres (0001)
+ORDER_STATUS = postgresql.ENUM("NEW", "IN_PROGRESS", "COMPLETED", "CANCELED", name="orderstatus", create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "order_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", ORDER_STATUS, nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "status"),
+    )
+    op.create_table(
+        "product_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", ORDER_STATUS, nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "status", "product_id"),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        day = "date(orders.created_at AT TIME ZONE 'UTC')"
+    else:
+        day = "date(orders.created_at)"
+    op.execute(f"""
+        INSERT INTO order_rollups (day, status, orders, revenue)
+        SELECT {day}, status, count(*), sum(total)
+        FROM orders GROUP BY 1, 2
+    """)
+    op.execute(f"""
+        INSERT INTO product_rollups (day, status, product_id, units, revenue)
+        SELECT {day}, orders.status, order_items.product_id,
+               sum(order_items.quantity), sum(order_items.product_price * order_items.quantity)
+        FROM order_items JOIN orders ON orders.id = order_items.order_id
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("product_rollups")
+    op.drop_table("order_rollups")
@@ -0,0 +1,46 @@
+"""Order events outbox
+
+Order changes are appended here in the same transaction as the change and
+streamed to admin dashboards by GET /orders/stream.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The orderstatus type already exists on Postgres (0001)
+ORDER_STATUS = postgresql.ENUM("NEW", "IN_PROGRESS", "COMPLETED", "CANCELED", name="orderstatus", create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "order_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("status", ORDER_STATUS, nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_order_events_created_at", "order_events", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_events_created_at", table_name="order_events")
+    op.drop_table("order_events")
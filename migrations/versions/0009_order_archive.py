@@ -0,0 +1,68 @@
+"""Order archive
+
+Completed and canceled orders past order_archive_after_days are moved here
+from orders and order_items by order_archive.py, keeping the hot tables small.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The orderstatus type already exists on Postgres (0001)
+ORDER_STATUS = postgresql.ENUM("NEW", "IN_PROGRESS", "COMPLETED", "CANCELED", name="orderstatus", create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "orders_archive",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("shipping_address", sa.Text(), nullable=False),
+        sa.Column("note", sa.Text(), nullable=True),
+        sa.Column("status", ORDER_STATUS, nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_orders_archive_created_at_id", "orders_archive", ["created_at", "id"])
+    op.create_index("ix_orders_archive_status_created_at", "orders_archive", ["status", "created_at", "id"])
+    op.create_table(
+        "order_items_archive",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("product_name", sa.String(), nullable=False),
+        sa.Column("product_price", sa.Float(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("selected_options", sa.Text(), nullable=True),
+        sa.Column("custom_engraving", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["order_id"], ["orders_archive.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_order_items_archive_order_id", "order_items_archive", ["order_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_items_archive_order_id", table_name="order_items_archive")
+    op.drop_table("order_items_archive")
+    op.drop_index("ix_orders_archive_status_created_at", table_name="orders_archive")
+    op.drop_index("ix_orders_archive_created_at_id", table_name="orders_archive")
+    op.drop_table("orders_archive")
@@ -0,0 +1,76 @@
+"""Never reuse product ids
+
+Without AUTOINCREMENT, SQLite hands a deleted product's id to the next
+product created, which then starts again at version 1. Anything keyed by
+(id, version), such as ETags and the parsed-options cache, would mistake it
+for the deleted product. Rebuilds products with AUTOINCREMENT on SQLite,
+starting the sequence past every product id still referenced anywhere.
+Postgres sequences never hand out an id twice, so there is nothing to do.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 00:00:09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FTS_COLUMNS = "name, short_description, description"
+
+# Tables holding product ids, including ones whose products may have been deleted
+PRODUCT_ID_COLUMNS = [
+    ("products", "id"),
+    ("product_options", "product_id"),
+    ("order_items", "product_id"),
+    ("order_items_archive", "product_id"),
+    ("product_rollups", "product_id"),
+]
+
+
+def _rebuild_products(autoincrement: bool) -> None:
+    """Recreate products; its FTS triggers (0004) go with the old table, so add them back"""
+    with op.batch_alter_table("products", recreate="always", table_kwargs={"sqlite_autoincrement": autoincrement}):
+        pass
+    op.execute(f"""
+        CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.name, new.short_description, new.description);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.name, old.short_description, old.description);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER products_fts_update AFTER UPDATE OF {FTS_COLUMNS} ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, old.name, old.short_description, old.description);
+            INSERT INTO products_fts(rowid, {FTS_COLUMNS})
+            VALUES (new.id, new.name, new.short_description, new.description);
+        END
+    """)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    _rebuild_products(autoincrement=True)
+    highest = " UNION ALL ".join(f"SELECT max({column}) AS id FROM {table}" for table, column in PRODUCT_ID_COLUMNS)
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'products'")
+    op.execute(f"INSERT INTO sqlite_sequence (name, seq) SELECT 'products', coalesce(max(id), 0) FROM ({highest})")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    _rebuild_products(autoincrement=False)
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Enum, Index, UniqueConstraint
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from datetime import datetime, timezone
 import enum
 
 class OrderStatus(str, enum.Enum):
@@ -10,23 +12,62 @@ class OrderStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
     CANCELED = "CANCELED"
 
+# Statuses an order may move to from each status in PATCH /orders/bulk; completed and canceled are final
+ORDER_TRANSITIONS = {
+    OrderStatus.NEW: {OrderStatus.IN_PROGRESS, OrderStatus.COMPLETED, OrderStatus.CANCELED},
+    OrderStatus.IN_PROGRESS: {OrderStatus.COMPLETED, OrderStatus.CANCELED},
+    OrderStatus.COMPLETED: set(),
+    OrderStatus.CANCELED: set(),
+}
+
+# SQLite's CURRENT_TIMESTAMP has second precision; bind datetimes the same way so
+# values read back from the database compare equal to what is stored (keyset cursors).
+Timestamp = DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
+def utc_timestamp(value: datetime) -> datetime:
+    """A datetime to compare with Timestamp columns: naive UTC, as SQLite stores them.
+    SQLite binds the wall-clock time and drops any offset; naive values are already UTC."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 class Product(Base):
     __tablename__ = "products"
+    # Never reuse ids on SQLite: ETags and caches key on (id, version)
+    __table_args__ = {"sqlite_autoincrement": True}
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     short_description = Column(String, nullable=True)
     price = Column(Float, nullable=False)
-    category = Column(String, nullable=False)  # e.g., "wall art", "coasters", "signs", "gifts"
+    category = Column(String, nullable=False, index=True)  # e.g., "wall art", "coasters", "signs", "gifts"
     image_url = Column(String, nullable=True)
     options = Column(Text, nullable=True)  # JSON string for size, wood type, finish options
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    sku = Column(String, nullable=True, unique=True, index=True)  # Supplier stock code; bulk imports upsert on it
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every update (ETag)
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
     
     # Relationship
     order_items = relationship("OrderItem", back_populates="product")
 
+class ProductOption(Base):
+    """One allowed value of one product option, mirrored from Product.options for SQL filtering"""
+    __tablename__ = "product_options"
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)  # e.g., "sizes", "woods"
+    value = Column(String, nullable=False)  # e.g., "16x16", "Walnut"
+    position = Column(Integer, nullable=False, default=0)  # Order within the option's list
+    
+    __table_args__ = (
+        UniqueConstraint("product_id", "name", "value", name="uq_product_options_product_name_value"),
+        # "Products offering sizes=16x16" without touching the products table
+        Index("ix_product_options_name_value", "name", "value", "product_id"),
+    )
+
 class Order(Base):
     __tablename__ = "orders"
     
@@ -42,18 +83,25 @@ class Order(Base):
     # Order details
     status = Column(Enum(OrderStatus), default=OrderStatus.NEW, nullable=False)
     total = Column(Float, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every update (ETag)
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
     
     # Relationship
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination order for the admin listing, with and without a status filter
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at", "status", "created_at", "id"),
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     
     # Snapshot of product details at time of order
     product_name = Column(String, nullable=False)
@@ -66,10 +114,89 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
 
+class ArchivedOrder(Base):
+    """Completed and canceled orders moved out of orders by order_archive.py; same columns, read-only"""
+    __tablename__ = "orders_archive"
+
+    id = Column(Integer, primary_key=True)  # The order's original id
+    first_name = Column(String, nullable=False)
+    last_name = Column(String, nullable=False)
+    email = Column(String, nullable=False)
+    phone = Column(String, nullable=True)
+    shipping_address = Column(Text, nullable=False)
+    note = Column(Text, nullable=True)
+    status = Column(Enum(OrderStatus), nullable=False)
+    total = Column(Float, nullable=False)
+    version = Column(Integer, nullable=False)
+    created_at = Column(Timestamp)
+    updated_at = Column(Timestamp)
+
+    items = relationship("ArchivedOrderItem", back_populates="order")
+
+    __table_args__ = (
+        Index("ix_orders_archive_created_at_id", "created_at", "id"),
+        Index("ix_orders_archive_status_created_at", "status", "created_at", "id"),
+    )
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "order_items_archive"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders_archive.id"), nullable=False, index=True)
+    product_id = Column(Integer, nullable=False)  # No foreign key: history outlives deleted products
+    product_name = Column(String, nullable=False)
+    product_price = Column(Float, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    selected_options = Column(Text, nullable=True)
+    custom_engraving = Column(Text, nullable=True)
+
+    order = relationship("ArchivedOrder", back_populates="items")
+
+class OrderRollup(Base):
+    """Orders and revenue per day and status, kept current by checkout and status changes"""
+    __tablename__ = "order_rollups"
+    
+    day = Column(Date, primary_key=True)  # UTC day the order was placed
+    status = Column(Enum(OrderStatus), primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+class ProductRollup(Base):
+    """Units sold and revenue per day, order status and product"""
+    __tablename__ = "product_rollups"
+    
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    product_id = Column(Integer, primary_key=True)  # No foreign key: history outlives deleted products
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+class OrderEvent(Base):
+    """Outbox of order changes, written with the change itself; feeds GET /orders/stream"""
+    __tablename__ = "order_events"
+    # Never reuse ids on SQLite, even once every event has been pruned
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True)  # SSE event id; clients resume after it
+    type = Column(String, nullable=False)  # "order.created" or "order.updated"
+    order_id = Column(Integer, nullable=False)
+    status = Column(Enum(OrderStatus), nullable=False)
+    total = Column(Float, nullable=False)
+    version = Column(Integer, nullable=False)
+    created_at = Column(Timestamp, server_default=func.now(), index=True)
+
 class Admin(Base):
     __tablename__ = "admins"
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, nullable=False, index=True)
     hashed_password = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+
+class CatalogVersion(Base):
+    """Generation counter bumped by every product write; cheap validator for catalog reads"""
+    __tablename__ = "catalog_versions"
+    
+    name = Column(String, primary_key=True)  # "products"
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,81 @@
+"""
+Hot/archive split for orders.
+Completed and canceled orders placed more than order_archive_after_days ago
+are moved, with their items, from orders/order_items to orders_archive/
+order_items_archive, so admin queries on the hot tables don't scan years of
+finished orders. GET /orders, GET /orders/{id} and GET /orders/export read
+the archive only with ?archived=true. Rollups already hold these orders'
+totals, so /orders/stats is unaffected.
+
+Run `python order_archive.py` daily (cron or a systemd timer). Each batch of
+order_archive_batch_size orders is copied and deleted in one transaction, so
+the job can be stopped at any point and rerun; it picks up what's left.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+from config import settings
+from models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+
+ARCHIVED_STATUSES = (OrderStatus.COMPLETED, OrderStatus.CANCELED)
+
+def _copy(source, target, condition):
+    """INSERT INTO target SELECT <target's columns> FROM source WHERE condition"""
+    names = list(target.__table__.c.keys())
+    return insert(target).from_select(names, select(*(source.__table__.c[name] for name in names)).where(condition))
+
+def archive_batch(db: Session, status: OrderStatus, cutoff: datetime, batch_size: int) -> int:
+    """Move the oldest batch of orders with status placed before cutoff and commit;
+    returns how many moved. One status at a time, so the batch is read in
+    ix_orders_status_created_at order instead of sorting every candidate."""
+    if db.bind.dialect.name == "sqlite":
+        # Take the write lock before choosing the batch, so no order changes status under us
+        db.execute(text("BEGIN IMMEDIATE"))
+    # SQLite hands out max(id) + 1 for new rows. Keeping the newest order and the
+    # order with the newest item hot (orders can have no items, so these differ)
+    # means an archived order's id, or its items' ids, is never handed out again
+    newest = db.scalar(select(func.max(Order.id)))
+    if newest is None:
+        db.commit()
+        return 0
+    conditions = [Order.status == status, Order.created_at < cutoff, Order.id < newest]
+    newest_item_order = db.scalar(select(OrderItem.order_id).order_by(OrderItem.id.desc()).limit(1))
+    if newest_item_order is not None:
+        conditions.append(Order.id != newest_item_order)
+    query = (
+        select(Order.id)
+        .where(*conditions)
+        .order_by(Order.created_at, Order.id)
+        .limit(batch_size)
+    )
+    if db.bind.dialect.name == "postgresql":
+        # Orders being changed right now are left for the next run
+        query = query.with_for_update(skip_locked=True)
+    ids = list(db.scalars(query).all())
+    if ids:
+        db.execute(_copy(Order, ArchivedOrder, Order.id.in_(ids)))
+        db.execute(_copy(OrderItem, ArchivedOrderItem, OrderItem.order_id.in_(ids)))
+        db.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+        db.execute(delete(Order).where(Order.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+def archive_orders(db: Session, older_than: datetime, batch_size: Optional[int] = None) -> int:
+    """Archive every completed or canceled order placed before older_than; returns how many moved"""
+    batch_size = batch_size or settings.order_archive_batch_size
+    moved = 0
+    for status in ARCHIVED_STATUSES:
+        while True:
+            count = archive_batch(db, status, older_than, batch_size)
+            if not count:
+                break
+            moved += count
+    return moved
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.order_archive_after_days)
+    with SessionLocal() as session:
+        moved = archive_orders(session, cutoff)
+    print(f"Archived {moved} orders placed before {cutoff:%Y-%m-%d}")
@@ -0,0 +1,219 @@
+"""
+Live order feed behind GET /orders/stream (server-sent events).
+create_order and update_order_status append a row to order_events in the
+same transaction as the change, so an event exists exactly when the change
+was committed. Each worker runs one OrderEventBroadcaster that reads new rows
+and fans them out to its connected dashboards: on Postgres it wakes on
+LISTEN/NOTIFY, on SQLite it polls every order_events_poll_interval_seconds.
+Because the events are rows, a reconnecting client resumes with
+Last-Event-ID from the table rather than from any one worker's memory.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal, async_engine
+from models import OrderEvent, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+ORDER_UPDATED = "order.updated"
+
+CHANNEL = "order_events"  # Postgres NOTIFY channel
+
+# Arbitrary key for the advisory lock that orders event ids by commit (see publish_order_event)
+_PUBLISH_LOCK = 7263001
+
+async def publish_order_event(
+    db: AsyncSession, event_type: str, order_id: int, status: OrderStatus, total: float, version: int
+):
+    """Record an order change for the live feed; call inside the transaction that makes it"""
+    await publish_order_events(db, event_type, [
+        {"order_id": order_id, "status": status, "total": total, "version": version}
+    ])
+
+async def publish_order_events(db: AsyncSession, event_type: str, orders: List[dict]):
+    """publish_order_event for several orders (order_id, status, total, version) in one insert"""
+    if not orders:
+        return
+    if db.bind.dialect.name == "postgresql":
+        # Sequence values are handed out before commit, so without this a later id could
+        # commit first and a reader that already moved past it would skip the earlier one.
+        # Held only from here to commit; SQLite writers are serialized anyway.
+        await db.execute(select(func.pg_advisory_xact_lock(_PUBLISH_LOCK)))
+        await db.execute(select(func.pg_notify(CHANNEL, "")))  # Delivered on commit
+    await db.execute(insert(OrderEvent), [{"type": event_type, **order} for order in orders])
+
+def event_data(event: OrderEvent) -> str:
+    """The JSON payload sent to dashboards for one event"""
+    created_at = event.created_at.isoformat() if event.created_at else None
+    return json.dumps({
+        "order_id": event.order_id,
+        "status": event.status.value,
+        "total": event.total,
+        "version": event.version,
+        "at": created_at,
+    }, separators=(",", ":"))
+
+async def events_after(db: AsyncSession, last_id: int, limit: int) -> List[OrderEvent]:
+    return list((await db.scalars(
+        select(OrderEvent).where(OrderEvent.id > last_id).order_by(OrderEvent.id).limit(limit)
+    )).all())
+
+async def event_id_range(db: AsyncSession) -> tuple:
+    """(oldest, newest) retained event ids, (None, None) if there are none"""
+    return tuple((await db.execute(select(func.min(OrderEvent.id), func.max(OrderEvent.id)))).one())
+
+async def prune_events(db: AsyncSession) -> int:
+    """Drop events older than the retention window; clients behind it get a reset"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.order_events_retention_hours)
+    result = await db.execute(delete(OrderEvent).where(OrderEvent.created_at < cutoff))
+    await db.commit()
+    return result.rowcount
+
+class OrderEventBroadcaster:
+    """Reads new events once per worker and hands them to every subscribed stream.
+
+    Each subscriber is a bounded queue. One that falls order_events_queue_size
+    events behind is dropped and sent None, so its stream ends and the client
+    reconnects and catches up from the table instead of buffering here.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.last_id = 0  # Newest event handed to subscribers
+
+    async def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.order_events_queue_size)
+        if not self.running:
+            async with AsyncSessionLocal() as db:
+                newest = (await event_id_range(db))[1] or 0
+            if not self.running:  # Another stream may have started it meanwhile
+                self.last_id = newest
+                self._wakeup = asyncio.Event()
+                self._task = asyncio.create_task(self._run())
+        self._subscribers.add(queue)
+        return queue
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        listener = None
+        try:
+            if async_engine.dialect.name == "postgresql":
+                try:
+                    listener = await self._listen()
+                except Exception:
+                    logger.exception("LISTEN %s failed; polling for order events instead", CHANNEL)
+            last_pruned = 0.0
+            loop = asyncio.get_running_loop()
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.order_events_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await self._deliver(db)
+                        if loop.time() - last_pruned > 3600:
+                            last_pruned = loop.time()
+                            await prune_events(db)
+                except Exception:
+                    # A database hiccup shouldn't end every stream; retry on the next tick
+                    logger.exception("Reading order events failed")
+        finally:
+            if listener is not None:
+                await self._unlisten(listener)
+
+    async def _deliver(self, db: AsyncSession):
+        while True:
+            events = await events_after(db, self.last_id, settings.order_events_queue_size)
+            for event in events:
+                self.last_id = event.id
+                for queue in list(self._subscribers):
+                    try:
+                        queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        self._drop(queue)
+            if len(events) < settings.order_events_queue_size:
+                return
+
+    def _drop(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        queue.get_nowait()
+        queue.put_nowait(None)
+
+    def _notified(self, *args):
+        self._wakeup.set()
+
+    async def _listen(self):
+        """Hold one pooled connection LISTENing on the channel while anyone is subscribed"""
+        connection = await async_engine.connect()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.add_listener(CHANNEL, self._notified)
+        return connection
+
+    async def _unlisten(self, connection):
+        try:
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.remove_listener(CHANNEL, self._notified)
+        finally:
+            await connection.close()
+
+broadcaster = OrderEventBroadcaster()
+
+def sse_frame(event: OrderEvent) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event_data(event)}\n\n"
+
+async def stream_order_events(last_event_id: Optional[int]):
+    """SSE body for one dashboard: replay after last_event_id, then follow live events.
+
+    Without last_event_id the feed starts at the newest event. If the requested
+    id has been pruned (or is ahead of the table, e.g. after a restore) a
+    `reset` event tells the client to reload its state before following along.
+    """
+    queue = await broadcaster.subscribe()
+    sent_id = broadcaster.last_id  # Anything newer arrives through the queue
+    try:
+        yield f"retry: {settings.order_events_retry_ms}\n\n"
+        if last_event_id is not None:
+            async with AsyncSessionLocal() as db:
+                oldest, newest = await event_id_range(db)
+                backlog = await events_after(db, last_event_id, settings.order_events_replay_limit + 1)
+            pruned = oldest is not None and last_event_id < oldest - 1
+            ahead = last_event_id > (newest or 0)
+            if pruned or ahead or len(backlog) > settings.order_events_replay_limit:
+                yield f"id: {sent_id}\nevent: reset\ndata: {{}}\n\n"
+            else:
+                for event in backlog:
+                    yield sse_frame(event)
+                sent_id = max(sent_id, backlog[-1].id) if backlog else last_event_id
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.order_events_keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"  # Keeps proxies from closing an idle connection
+                continue
+            if event is None:
+                return  # Fell behind; the client reconnects with Last-Event-ID
+            if event.id > sent_id:
+                sent_id = event.id
+                yield sse_frame(event)
+    finally:
+        broadcaster.unsubscribe(queue)
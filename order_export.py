@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus, utc_timestamp
+
+# Streams every matching order as CSV (one row per order item, order columns
+# repeated) or NDJSON (one order per line, items nested as in GET /orders/{id}).
+# Rows come off a server-side cursor in batches of export_batch_size, so memory
+# use doesn't grow with the number of orders exported.
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _order_columns(model) -> list:
+    return [
+        model.id.label("order_id"), model.created_at, model.updated_at, model.status,
+        model.first_name, model.last_name, model.email, model.phone,
+        model.shipping_address, model.note, model.total, model.version,
+    ]
+
+def _item_columns(model) -> list:
+    return [
+        model.id.label("item_id"), model.product_id, model.product_name,
+        model.product_price, model.quantity, model.selected_options, model.custom_engraving,
+    ]
+
+CSV_HEADER = [column.key for column in _order_columns(Order) + _item_columns(OrderItem)]
+
+def export_query(since: Optional[datetime] = None, status: Optional[OrderStatus] = None, archived: bool = False):
+    """Orders joined to their items, oldest first, item lines of an order adjacent;
+    from the archive tables instead when archived"""
+    order_model, item_model = (ArchivedOrder, ArchivedOrderItem) if archived else (Order, OrderItem)
+    query = (
+        select(*_order_columns(order_model), *_item_columns(item_model))
+        .select_from(order_model)
+        .outerjoin(item_model, item_model.order_id == order_model.id)
+        .order_by(order_model.id, item_model.id)
+    )
+    if since:
+        query = query.where(order_model.created_at >= utc_timestamp(since))
+    if status:
+        query = query.where(order_model.status == status)
+    return query
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _csv_value(value):
+    if isinstance(value, OrderStatus):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _order(row) -> dict:
+    return {
+        "id": row.order_id,
+        "first_name": row.first_name,
+        "last_name": row.last_name,
+        "email": row.email,
+        "phone": row.phone,
+        "shipping_address": row.shipping_address,
+        "note": row.note,
+        "status": row.status.value,
+        "total": row.total,
+        "version": row.version,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "items": [],
+    }
+
+def _item(row) -> dict:
+    return {
+        "id": row.item_id,
+        "order_id": row.order_id,
+        "product_id": row.product_id,
+        "product_name": row.product_name,
+        "product_price": row.product_price,
+        "quantity": row.quantity,
+        "selected_options": row.selected_options,
+        "custom_engraving": row.custom_engraving,
+    }
+
+def _ndjson_line(order: dict) -> str:
+    return json.dumps(order, default=_json_value, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+async def stream_orders(
+    open_session: Callable[[], Awaitable[AsyncSession]],
+    export_format: str,
+    since: Optional[datetime] = None,
+    status: Optional[OrderStatus] = None,
+    archived: bool = False,
+) -> AsyncIterator[bytes]:
+    """Encoded export, one chunk per batch of joined rows. The session comes from
+    open_session once streaming starts, so an export that never starts (the client
+    left first) never opens one, and is closed when the stream ends."""
+    async with await open_session() as db:
+        result = await db.stream(
+            export_query(since, status, archived).execution_options(yield_per=settings.export_batch_size)
+        )
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(CSV_HEADER)
+            async for rows in result.partitions():
+                writer.writerows([_csv_value(value) for value in row] for row in rows)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+            return
+
+        # NDJSON: an order's item rows may straddle two batches, so it is
+        # written once the first row of the next order arrives
+        order = None
+        async for rows in result.partitions():
+            lines = []
+            for row in rows:
+                if order is None or order["id"] != row.order_id:
+                    if order is not None:
+                        lines.append(_ndjson_line(order))
+                    order = _order(row)
+                if row.item_id is not None:
+                    order["items"].append(_item(row))
+            if lines:
+                yield "".join(lines).encode("utf-8")
+        if order is not None:
+            yield _ndjson_line(order).encode("utf-8")
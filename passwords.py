@@ -0,0 +1,65 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from config import settings
+
+# Password hashing; hashes with a different cost than bcrypt_rounds are flagged for rehash
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+class HasherBusy(Exception):
+    """Raised when too many password hashes are already queued"""
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plain password against a hashed password"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    """Hash a password"""
+    return pwd_context.hash(password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a new hash if the stored one uses an outdated cost"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+# bcrypt runs in a small dedicated process pool so it neither holds the GIL
+# nor occupies the threadpool shared with the rest of the API
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that already runs an event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+async def _run(func, *args):
+    global _pending
+    if _pending >= settings.password_hash_max_pending:
+        raise HasherBusy()
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update on the password executor; raises HasherBusy when saturated"""
+    return await _run(verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the password executor; raises HasherBusy when saturated"""
+    return await _run(get_password_hash, password)
+
+def shutdown_executor():
+    """Stop the password executor's worker processes"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
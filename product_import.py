@@ -0,0 +1,144 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models import Product, ProductOption
+from product_options import option_rows, parse_options
+import schemas
+
+# POST /products/bulk: rows are parsed and validated as the upload streams in,
+# and upserted on sku in batches of product_import_batch_size, all in the
+# caller's transaction. Invalid rows are reported and skipped.
+
+FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+IMPORT_FIELDS = list(schemas.ProductCreate.model_fields)
+
+Row = Tuple[int, Optional[dict]]  # (line the row starts on, parsed fields or None if unreadable)
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream into lines, keeping their line endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+async def ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Row]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        yield line_number, data if isinstance(data, dict) else None
+
+async def csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Row]:
+    """Rows keyed by the header line; empty cells are treated as missing"""
+    header = None
+    line_number, start, record = 0, 0, ""
+    async for line in lines:
+        line_number += 1
+        if not record:
+            start = line_number
+        record += line
+        # A quoted field may span lines; the record ends once its quotes balance
+        if record.count('"') % 2:
+            continue
+        values, record = next(csv.reader([record])), ""
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield start, {name: value for name, value in zip(header, values) if value != ""}
+    if record:
+        yield start, None
+
+def validate_row(data: Optional[dict]) -> Tuple[Optional[dict], List[str]]:
+    """Product column values for a row, or the reasons it can't be imported"""
+    if data is None:
+        return None, ["row could not be parsed"]
+    try:
+        product = schemas.ProductCreate.model_validate(data)
+    except ValidationError as e:
+        return None, [
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+        ]
+    errors = []
+    if not product.sku:
+        errors.append("sku: required for bulk import")
+    try:
+        parse_options(product.options)
+    except ValueError as e:
+        errors.append(f"options: {e}")
+    return (None, errors) if errors else (product.model_dump(), [])
+
+def upsert_statement(dialect_name: str):
+    """INSERT ... ON CONFLICT (sku) DO UPDATE, bumping the version of updated rows"""
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = dialect_insert(Product.__table__)
+    changes = {field: statement.excluded[field] for field in IMPORT_FIELDS if field != "sku"}
+    return statement.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={**changes, "version": Product.version + 1, "updated_at": func.now()},
+    )
+
+async def write_batch(db: AsyncSession, batch: Dict[str, dict]) -> Tuple[int, int]:
+    """Upsert one batch (keyed by sku) and rewrite its option rows; returns (created, updated)"""
+    await db.execute(upsert_statement(db.bind.dialect.name), list(batch.values()))
+
+    # New rows start at version 1; any row that existed was just bumped past it
+    rows = (await db.execute(
+        select(Product.id, Product.sku, Product.version).where(Product.sku.in_(list(batch)))
+    )).all()
+    created = sum(1 for row in rows if row.version == 1)
+
+    ids = [row.id for row in rows]
+    await db.execute(delete(ProductOption).where(ProductOption.product_id.in_(ids)))
+    options = [
+        option
+        for row in rows
+        for option in option_rows(row.id, parse_options(batch[row.sku]["options"]))
+    ]
+    if options:
+        await db.execute(insert(ProductOption), options)
+    return created, len(rows) - created
+
+async def import_products(db: AsyncSession, rows: AsyncIterator[Row]) -> dict:
+    """Validate and upsert every row; the caller commits"""
+    created = updated = 0
+    errors = []
+    batch: Dict[str, dict] = {}
+    async for line, data in rows:
+        values, row_errors = validate_row(data)
+        if row_errors:
+            sku = data.get("sku") if data else None
+            errors.append({"line": line, "sku": sku if isinstance(sku, str) else None, "errors": row_errors})
+            continue
+        # A sku repeated within a batch keeps its last row, as it would across batches
+        batch.pop(values["sku"], None)
+        batch[values["sku"]] = values
+        if len(batch) >= settings.product_import_batch_size:
+            batch_created, batch_updated = await write_batch(db, batch)
+            created, updated, batch = created + batch_created, updated + batch_updated, {}
+    if batch:
+        batch_created, batch_updated = await write_batch(db, batch)
+        created, updated = created + batch_created, updated + batch_updated
+    return {"created": created, "updated": updated, "errors": errors}
@@ -0,0 +1,100 @@
+import json
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from cache import TTLCache
+from config import settings
+from models import Product, ProductOption
+
+# Product.options stays the JSON text the storefront reads, e.g.
+# {"sizes": ["12x12", "16x16"], "finishes": ["Natural", "Dark Walnut"]}.
+# Each name/value pair is also stored as a product_options row so products can
+# be filtered in SQL, and parsed option sets are cached per product version.
+
+Options = Dict[str, List[str]]
+
+# Keyed by (product_id, version): a product update bumps the version and ids
+# are never reused, so stale entries are never read, in this worker or any other
+option_cache = TTLCache(settings.product_options_cache_size, settings.product_options_cache_ttl_seconds)
+
+def parse_options(text: Optional[str]) -> Options:
+    """Parse Product.options; raises ValueError unless it maps names to lists of strings"""
+    if not text:
+        return {}
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise ValueError("options must be valid JSON")
+    if not isinstance(data, dict):
+        raise ValueError("options must be a JSON object")
+    for name, values in data.items():
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise ValueError(f'option "{name}" must be a list of strings')
+    return {name: list(dict.fromkeys(values)) for name, values in data.items()}
+
+def product_options(product_id: int, version: int, text: Optional[str]) -> Options:
+    """Parsed options of one product version, parsed at most once per worker"""
+    key = (product_id, version)
+    options = option_cache.get(key)
+    if options is None:
+        try:
+            options = parse_options(text)
+        except ValueError:
+            options = {}  # Legacy text that predates validation offers nothing to choose
+        option_cache.set(key, options)
+    return options
+
+def parse_selection(text: Optional[str], options: Options) -> Optional[str]:
+    """Check selected_options against a product's options.
+
+    Returns the selection as canonical JSON (sorted keys), or None when nothing
+    was selected; raises ValueError naming the first invalid choice.
+    """
+    if not text:
+        return None
+    try:
+        selection = json.loads(text)
+    except ValueError:
+        raise ValueError("selected_options must be valid JSON")
+    if not isinstance(selection, dict):
+        raise ValueError("selected_options must be a JSON object")
+    for name, value in selection.items():
+        if name not in options:
+            raise ValueError(f'unknown option "{name}"')
+        if value not in options[name]:
+            raise ValueError(f'"{value}" is not available for option "{name}"')
+    return json.dumps(selection, sort_keys=True) if selection else None
+
+def option_rows(product_id: int, options: Options) -> List[dict]:
+    return [
+        {"product_id": product_id, "name": name, "value": value, "position": position}
+        for name, values in options.items()
+        for position, value in enumerate(values)
+    ]
+
+async def replace_product_options(db: AsyncSession, product_id: int, options: Options, existing: bool = True):
+    """Rewrite a product's option rows; call inside the writing transaction"""
+    if existing:
+        await db.execute(delete(ProductOption).where(ProductOption.product_id == product_id))
+    rows = option_rows(product_id, options)
+    if rows:
+        await db.execute(insert(ProductOption), rows)
+
+async def delete_product_options(db: AsyncSession, product_id: int):
+    # SQLite doesn't enforce the ON DELETE CASCADE
+    await db.execute(delete(ProductOption).where(ProductOption.product_id == product_id))
+
+def parse_option_filter(spec: str) -> Tuple[str, str]:
+    """Split an ?option=name:value filter"""
+    name, sep, value = spec.partition(":")
+    if not sep or not name or not value:
+        raise ValueError(f'option filter "{spec}" must look like name:value')
+    return name, value
+
+def filter_by_options(query, filters: List[Tuple[str, str]]):
+    """Restrict a Product query to products offering every (name, value) pair"""
+    for name, value in filters:
+        query = query.where(Product.id.in_(
+            select(ProductOption.product_id).where(ProductOption.name == name, ProductOption.value == value)
+        ))
+    return query
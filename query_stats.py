@@ -0,0 +1,90 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import settings
+
+logger = logging.getLogger("timberpunk.sql")
+
+class QueryStats:
+    """Statements issued while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.selects = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.selects[statement] += 1
+
+    def repeated_selects(self, threshold: int) -> list:
+        """(statement, times) for identical SELECTs run at least threshold times: likely N+1"""
+        return [(sql, n) for sql, n in self.selects.most_common() if n >= threshold]
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+def instrument(*engines: Engine):
+    """Attach query timing to the given (sync) engines"""
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+class QueryStatsMiddleware:
+    """Count statements and DB time per request, report them in Server-Timing
+    and log identical SELECTs repeated often enough to look like an N+1"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.sql_server_timing:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", server_timing(stats).encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for statement, times in stats.repeated_selects(settings.sql_n_plus_one_threshold):
+                logger.warning(
+                    "Possible N+1 on %s %s: statement ran %d times: %s",
+                    scope["method"], scope["path"], times, " ".join(statement.split())[:200],
+                )
+
+def server_timing(stats: QueryStats) -> str:
+    value = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+    repeated = stats.repeated_selects(settings.sql_n_plus_one_threshold)
+    if repeated:
+        value += f', n-plus-one;desc="{len(repeated)} repeated selects"'
+    return value
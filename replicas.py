@@ -0,0 +1,168 @@
+"""
+Read-replica routing (DATABASE_REPLICA_URLS).
+Routes that only read take their session from get_read_db instead of
+get_async_db. With replicas configured, that session is bound to one of them
+(round robin) and writes stay on the primary, except that reads go to the
+primary as well when:
+- the client wrote within replica_sticky_seconds. Successful writes set the
+  READ_PRIMARY_COOKIE cookie, so clients read their own writes whichever
+  worker serves them.
+- no replica is usable. Each worker compares every replica's replication
+  position with the primary's every replica_check_interval_seconds. It skips
+  replicas that are unreachable, or that lag by more than
+  replica_max_lag_seconds: when a replica is found behind, the primary's
+  position at that moment becomes its target, and its lag is how long it
+  has taken to reach that target. Once it has, the current primary position
+  becomes the next target, so a replica trailing steady writes by a few
+  milliseconds never catches the latest position but still shows a small lag.
+
+The position is the newest order event id plus the catalog generation, and
+every order or product write advances one of them. The check works the same
+for a Postgres streaming replica and for a copy of a SQLite file, e.g. one
+kept current by litestream or `sqlite3 .backup`, which is how it is tested
+locally (benchmarks/check_replica_routing.py).
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from typing import List, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from catalog import CATALOG
+from config import settings
+from database import AsyncSessionLocal, create_request_engine
+from metrics import record_read_session, record_replica_lag
+from models import CatalogVersion, OrderEvent
+
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_COOKIE = "tp_read_primary"
+
+async def replication_position(db: AsyncSession) -> Tuple[int, int]:
+    """(newest order event id, catalog generation) as seen by db"""
+    row = (await db.execute(select(
+        select(func.max(OrderEvent.id)).scalar_subquery(),
+        select(CatalogVersion.version).where(CatalogVersion.name == CATALOG).scalar_subquery(),
+    ))).one()
+    return row[0] or 0, row[1] or 0
+
+def _reached(position: Tuple[int, int], target: Tuple[int, int]) -> bool:
+    return position[0] >= target[0] and position[1] >= target[1]
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_request_engine(url, name)
+        self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        self.usable = False  # Until the first check has seen it caught up
+        self.target: Optional[Tuple[int, int]] = None  # Primary position it is catching up to
+        self.behind_since: Optional[float] = None  # When the primary was at target
+
+    async def check(self, primary: Tuple[int, int], primary_read_at: float):
+        """Compare this replica's position with the primary's (read at primary_read_at) and update usable"""
+        try:
+            async with self.sessionmaker() as db:
+                position = await asyncio.wait_for(replication_position(db), settings.replica_max_lag_seconds)
+        except Exception as e:
+            self.unavailable(e)
+            return
+        if _reached(position, primary):
+            self.target = self.behind_since = None
+        elif self.target is None or _reached(position, self.target):
+            # Behind the latest writes: measure the lag as the time to reach where the primary is now
+            self.target, self.behind_since = primary, primary_read_at
+        lag = 0.0 if self.behind_since is None else time.monotonic() - self.behind_since
+        record_replica_lag(self.name, lag)
+        if self.usable and lag > settings.replica_max_lag_seconds:
+            logger.warning("Replica %s is %.1fs behind; reading from the primary", self.name, lag)
+        self.usable = lag <= settings.replica_max_lag_seconds
+
+    def unavailable(self, error: Exception):
+        if self.usable:
+            logger.warning("Replica %s is unavailable (%s); reading from the primary", self.name, error)
+        self.usable = False
+
+class ReadRouter:
+    """Picks the session for each read-only request; one per worker"""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(f"replica{i + 1}", url) for i, url in enumerate(urls)]
+        self._next = 0
+        self._checked_at = float("-inf")
+        self._check_task: Optional[asyncio.Task] = None
+
+    async def session(self, request: Request) -> AsyncSession:
+        """A session for a request that only reads; connected already when it is a replica's"""
+        if not self.replicas:
+            return AsyncSessionLocal()
+        self._schedule_check()
+        if READ_PRIMARY_COOKIE in request.cookies:
+            record_read_session("primary_sticky")
+            return AsyncSessionLocal()
+        usable = [replica for replica in self.replicas if replica.usable]
+        if usable:
+            replica = usable[self._next % len(usable)]
+            self._next += 1
+            db = replica.sessionmaker()
+            try:
+                # Connect now, while the request can still move to the primary
+                await db.connection()
+            except Exception as e:
+                await db.close()
+                replica.unavailable(e)
+            else:
+                record_read_session("replica")
+                return db
+        record_read_session("primary_fallback")
+        return AsyncSessionLocal()
+
+    def _schedule_check(self):
+        now = time.monotonic()
+        if now - self._checked_at < settings.replica_check_interval_seconds:
+            return
+        if self._check_task is not None and not self._check_task.done():
+            return
+        self._checked_at = now
+        # Fresh context: the check's statements shouldn't count towards this request's Server-Timing
+        self._check_task = contextvars.Context().run(asyncio.create_task, self._check())
+
+    async def _check(self):
+        try:
+            read_at = time.monotonic()
+            async with AsyncSessionLocal() as db:
+                primary = await replication_position(db)
+        except Exception:
+            logger.exception("Reading the primary's replication position failed")
+            return
+        await asyncio.gather(*(replica.check(primary, read_at) for replica in self.replicas))
+
+read_router = ReadRouter([url.strip() for url in settings.database_replica_urls.split(",") if url.strip()])
+
+async def get_read_db(request: Request):
+    """Dependency for routes that only read: a replica session when one is usable, else the primary"""
+    async with await read_router.session(request) as db:
+        yield db
+
+class ReadYourWritesMiddleware:
+    """Set READ_PRIMARY_COOKIE on successful writes, so the client's next reads
+    see them. Does nothing without replicas."""
+
+    def __init__(self, app):
+        self.app = app
+        self._cookie = (
+            f"{READ_PRIMARY_COOKIE}=1; Max-Age={settings.replica_sticky_seconds}; Path=/; HttpOnly; SameSite=Lax"
+        ).encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS") or not read_router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", self._cookie)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
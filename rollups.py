@@ -0,0 +1,177 @@
+"""
+Sales rollups behind GET /orders/stats.
+Checkout and status changes apply their deltas to order_rollups and
+product_rollups in the same transaction as the order itself. Run
+`python rollups.py` to rebuild both tables from orders/order_items (and their
+archive tables) and report any buckets that had drifted.
+"""
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderRollup, OrderStatus, ProductRollup
+
+def order_day(created_at: datetime) -> date:
+    """UTC calendar day of an order timestamp (naive values are already UTC)"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+def _upsert(dialect_name: str, model, counters: List[str]):
+    """INSERT ... ON CONFLICT (primary key) DO UPDATE adding the new values to the counters"""
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = dialect_insert(model.__table__)
+    return statement.on_conflict_do_update(
+        index_elements=[column.name for column in model.__table__.primary_key],
+        set_={name: getattr(model, name) + statement.excluded[name] for name in counters},
+    )
+
+Deltas = Tuple[Dict[tuple, list], Dict[tuple, list]]  # (order buckets, product buckets) -> [count, revenue]
+
+def _add_deltas(deltas: Deltas, day: date, total: float, items: Iterable[dict], buckets: List[Tuple[OrderStatus, int]]):
+    order_buckets, product_buckets = deltas
+    items = list(items)
+    for status, sign in buckets:
+        counters = order_buckets.setdefault((day, status), [0, 0.0])
+        counters[0] += sign
+        counters[1] += sign * total
+        # An order may hold several lines of the same product; they share one row
+        for item in items:
+            counters = product_buckets.setdefault((day, status, item["product_id"]), [0, 0.0])
+            counters[0] += sign * item["quantity"]
+            counters[1] += sign * item["product_price"] * item["quantity"]
+
+async def _write_deltas(db: AsyncSession, deltas: Deltas):
+    """One upsert per rollup table, however many orders the deltas cover"""
+    order_buckets, product_buckets = deltas
+    dialect_name = db.bind.dialect.name
+    if order_buckets:
+        await db.execute(_upsert(dialect_name, OrderRollup, ["orders", "revenue"]), [
+            {"day": day, "status": status, "orders": orders, "revenue": revenue}
+            for (day, status), (orders, revenue) in order_buckets.items()
+        ])
+    if product_buckets:
+        await db.execute(_upsert(dialect_name, ProductRollup, ["units", "revenue"]), [
+            {"day": day, "status": status, "product_id": product_id, "units": units, "revenue": revenue}
+            for (day, status, product_id), (units, revenue) in product_buckets.items()
+        ])
+
+async def apply_order_deltas(
+    db: AsyncSession,
+    day: date,
+    total: float,
+    items: Iterable[dict],
+    buckets: List[Tuple[OrderStatus, int]],
+):
+    """Add an order (sign 1) to or remove it (sign -1) from each status bucket.
+
+    items are the order's lines (product_id, product_price, quantity). Call
+    inside the transaction that writes the order.
+    """
+    deltas: Deltas = ({}, {})
+    _add_deltas(deltas, day, total, items, buckets)
+    await _write_deltas(db, deltas)
+
+async def record_order(db: AsyncSession, created_at: datetime, status: OrderStatus, total: float, items: Iterable[dict]):
+    """Count a new order"""
+    await apply_order_deltas(db, order_day(created_at), total, items, [(status, 1)])
+
+async def move_order(
+    db: AsyncSession, created_at: datetime, old: OrderStatus, new: OrderStatus, total: float, items: Iterable[dict]
+):
+    """Move an order's counts from its old status bucket to the new one"""
+    if old != new:
+        await apply_order_deltas(db, order_day(created_at), total, items, [(old, -1), (new, 1)])
+
+async def move_orders(db: AsyncSession, moves: Iterable[tuple]):
+    """move_order for many orders in two statements; each move is (created_at, old, new, total, items)"""
+    deltas: Deltas = ({}, {})
+    for created_at, old, new, total, items in moves:
+        if old != new:
+            _add_deltas(deltas, order_day(created_at), total, items, [(old, -1), (new, 1)])
+    await _write_deltas(db, deltas)
+
+# ===== Rebuild =====
+
+def _day_column(dialect_name: str, order_model):
+    if dialect_name == "postgresql":
+        return func.date(func.timezone("UTC", order_model.created_at))
+    return func.date(order_model.created_at)
+
+def _as_date(value) -> date:
+    # SQLite's date() returns text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def _expected(db: Session) -> Tuple[dict, dict]:
+    """Rollup rows recomputed from the hot and archived orders, keyed by primary key"""
+    orders, products = {}, {}
+    for order_model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+        day = _day_column(db.bind.dialect.name, order_model)
+        order_rows = db.execute(
+            select(day, order_model.status, func.count(), func.sum(order_model.total))
+            .group_by(day, order_model.status)
+        )
+        product_rows = db.execute(
+            select(
+                day, order_model.status, item_model.product_id,
+                func.sum(item_model.quantity), func.sum(item_model.product_price * item_model.quantity),
+            )
+            .join(order_model, order_model.id == item_model.order_id)
+            .group_by(day, order_model.status, item_model.product_id)
+        )
+        for d, s, count, revenue in order_rows:
+            bucket = orders.get((_as_date(d), s), (0, 0.0))
+            orders[(_as_date(d), s)] = (bucket[0] + count, bucket[1] + revenue)
+        for d, s, p, units, revenue in product_rows:
+            bucket = products.get((_as_date(d), s, p), (0, 0.0))
+            products[(_as_date(d), s, p)] = (bucket[0] + units, bucket[1] + revenue)
+    return orders, products
+
+def _drifted(current: dict, expected: dict) -> int:
+    """Buckets whose counters differ, ignoring empty buckets and float rounding"""
+    keys = set(current) | set(expected)
+    def differs(a, b):
+        return a[0] != b[0] or abs(a[1] - b[1]) > 0.005
+    return sum(1 for key in keys if differs(current.get(key, (0, 0.0)), expected.get(key, (0, 0.0))))
+
+def rebuild_rollups(db: Session) -> Tuple[int, int]:
+    """Replace both rollup tables with totals recomputed from the raw orders.
+    Returns the number of order and product buckets that had drifted."""
+    if db.bind.dialect.name == "postgresql":
+        # Checkouts wait here instead of adding deltas to a half-built rollup
+        db.execute(text("LOCK TABLE order_rollups, product_rollups IN EXCLUSIVE MODE"))
+    # Delete first: on SQLite that takes the write lock before the orders are read
+    current_orders = {
+        (d, s): (count, revenue)
+        for d, s, count, revenue in db.execute(delete(OrderRollup).returning(
+            OrderRollup.day, OrderRollup.status, OrderRollup.orders, OrderRollup.revenue
+        ))
+    }
+    current_products = {
+        (d, s, p): (units, revenue)
+        for d, s, p, units, revenue in db.execute(delete(ProductRollup).returning(
+            ProductRollup.day, ProductRollup.status, ProductRollup.product_id,
+            ProductRollup.units, ProductRollup.revenue
+        ))
+    }
+    expected_orders, expected_products = _expected(db)
+    if expected_orders:
+        db.execute(OrderRollup.__table__.insert(), [
+            {"day": d, "status": s, "orders": count, "revenue": revenue}
+            for (d, s), (count, revenue) in expected_orders.items()
+        ])
+    if expected_products:
+        db.execute(ProductRollup.__table__.insert(), [
+            {"day": d, "status": s, "product_id": p, "units": units, "revenue": revenue}
+            for (d, s, p), (units, revenue) in expected_products.items()
+        ])
+    db.commit()
+    return _drifted(current_orders, expected_orders), _drifted(current_products, expected_products)
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    with SessionLocal() as session:
+        order_buckets, product_buckets = rebuild_rollups(session)
+    print(f"Rollups rebuilt; {order_buckets} order and {product_buckets} product buckets had drifted")
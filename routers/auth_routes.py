@@ -1,18 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from database import get_db
+from admission import admit
+from database import get_async_db
 from auth import authenticate_admin, create_access_token, get_current_admin
 from config import settings
 from models import Admin
+from passwords import HasherBusy
 import schemas
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-@router.post("/login", response_model=schemas.Token)
-def login(login_data: schemas.AdminLogin, db: Session = Depends(get_db)):
+@router.post("/login", response_model=schemas.Token, dependencies=[Depends(admit("login"))])
+async def login(login_data: schemas.AdminLogin, db: AsyncSession = Depends(get_async_db)):
     """Admin login endpoint"""
-    admin = authenticate_admin(db, login_data.email, login_data.password)
+    try:
+        admin = await authenticate_admin(db, login_data.email, login_data.password)
+    except HasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, try again shortly",
+            headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+        )
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,6 +37,6 @@ def login(login_data: schemas.AdminLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=schemas.AdminResponse)
-def get_current_user(current_admin: Admin = Depends(get_current_admin)):
+async def get_current_user(current_admin: Admin = Depends(get_current_admin)):
     """Get current authenticated admin"""
     return current_admin
@@ -1,101 +1,446 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from database import get_db
-from models import Order, OrderItem, Product, Admin, OrderStatus
-from auth import get_current_admin
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from datetime import date, datetime
+from functools import partial
+from typing import Literal, Optional
+from admission import admit
+from config import settings
+from database import get_async_db
+from fast_json import columns, order_page_response, requested_fields, schema_columns
+from models import (
+    Order, OrderItem, ArchivedOrder, ArchivedOrderItem, OrderRollup, Product, ProductRollup, Admin, OrderStatus,
+    ORDER_TRANSITIONS, utc_timestamp,
+)
+from auth import get_current_admin, get_stream_admin
+from group_commit import checkout_commits
+from conditional import validator_headers, is_conditional, is_not_modified, not_modified
+from order_export import FORMATS, stream_orders
+from metrics import record_checkout, record_status_change
+from order_events import ORDER_CREATED, ORDER_UPDATED, publish_order_event, publish_order_events, stream_order_events
+from pagination import encode_cursor, decode_cursor
+from product_options import product_options, parse_selection
+from replicas import get_read_db, read_router
+from rollups import record_order, move_order, move_orders
 import schemas
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-@router.post("/", response_model=schemas.Order, status_code=status.HTTP_201_CREATED)
-def create_order(order_data: schemas.OrderCreate, db: Session = Depends(get_db)):
+def order_validators(order_id: int, version: int, created_at, updated_at) -> dict:
+    # Admin data: browsers may keep it but must revalidate, shared caches must not store it
+    return validator_headers(f"order-{order_id}-{version}", updated_at or created_at, "private, no-cache")
+
+async def write_order(db: AsyncSession, order_values: dict, items: list):
+    """Insert an order and its items, count it in the rollups and publish its event.
+    Returns the order's (id, created_at) and the new items' ids, in the order of items.
+    Leaves items unchanged, so a failed attempt can be rerun with them. The caller commits."""
+    # Create order, reading back the generated id and timestamp in the same statement
+    order_row = (await db.execute(
+        insert(Order).returning(Order.id, Order.created_at), order_values
+    )).one()
+    
+    # Create order items in one batched insert; ids are always assigned by the database
+    item_ids = []
+    if items:
+        rows = [{**item_data, "order_id": order_row.id} for item_data in items]
+        # RETURNING order isn't guaranteed for batched inserts, so match ids back by line
+        inserted = await db.execute(
+            insert(OrderItem).returning(
+                OrderItem.id, OrderItem.product_id, OrderItem.selected_options, OrderItem.custom_engraving
+            ),
+            rows
+        )
+        ids_by_line = {
+            (row.product_id, row.selected_options, row.custom_engraving): row.id for row in inserted
+        }
+        item_ids = [
+            ids_by_line[(item_data["product_id"], item_data["selected_options"], item_data["custom_engraving"])]
+            for item_data in items
+        ]
+    
+    await record_order(db, order_row.created_at, OrderStatus.NEW, order_values["total"], items)
+    await publish_order_event(db, ORDER_CREATED, order_row.id, OrderStatus.NEW, order_values["total"], 1)
+    return order_row, item_ids
+
+@router.post(
+    "/", response_model=schemas.Order, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admit("checkout"))],
+)
+async def create_order(order_data: schemas.OrderCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new order (public checkout)"""
-    # Validate products and calculate total
-    total = 0.0
-    items_to_create = []
+    # Resolve every product in a single query
+    product_ids = {item.product_id for item in order_data.items}
+    products = {}
+    if product_ids:
+        rows = await db.execute(
+            select(Product.id, Product.name, Product.price, Product.version, Product.options)
+            .where(Product.id.in_(product_ids))
+        )
+        products = {row.id: row for row in rows}
     
+    # Validate option choices and merge repeated cart lines for the same product and customization
+    lines = {}
     for item in order_data.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        product = products.get(item.product_id)
         if not product:
+            record_checkout("unknown_product")
             raise HTTPException(
                 status_code=404,
                 detail=f"Product with id {item.product_id} not found"
             )
-        
-        item_total = product.price * item.quantity
+        options = product_options(product.id, product.version, product.options)
+        try:
+            selected_options = parse_selection(item.selected_options, options)
+        except ValueError as e:
+            record_checkout("invalid_options")
+            raise HTTPException(
+                status_code=422,
+                detail=f"Invalid selected_options for product {item.product_id}: {e}"
+            )
+        key = (item.product_id, selected_options, item.custom_engraving)
+        lines[key] = lines.get(key, 0) + item.quantity
+    
+    # Calculate total
+    total = 0.0
+    items_to_create = []
+    
+    for (product_id, selected_options, custom_engraving), quantity in lines.items():
+        product = products[product_id]
+        item_total = product.price * quantity
         total += item_total
         
         items_to_create.append({
             "product_id": product.id,
             "product_name": product.name,
             "product_price": product.price,
-            "quantity": item.quantity,
-            "selected_options": item.selected_options,
-            "custom_engraving": item.custom_engraving
+            "quantity": quantity,
+            "selected_options": selected_options,
+            "custom_engraving": custom_engraving
         })
     
-    # Create order
-    db_order = Order(
-        first_name=order_data.first_name,
-        last_name=order_data.last_name,
-        email=order_data.email,
-        phone=order_data.phone,
-        shipping_address=order_data.shipping_address,
-        note=order_data.note,
-        total=total,
-        status=OrderStatus.NEW
-    )
-    db.add(db_order)
-    db.flush()  # Get the order ID
-    
-    # Create order items
-    for item_data in items_to_create:
-        db_item = OrderItem(order_id=db_order.id, **item_data)
-        db.add(db_item)
+    order_values = {
+        "first_name": order_data.first_name,
+        "last_name": order_data.last_name,
+        "email": order_data.email,
+        "phone": order_data.phone,
+        "shipping_address": order_data.shipping_address,
+        "note": order_data.note,
+        "total": total,
+        "status": OrderStatus.NEW
+    }
+    if settings.checkout_group_commit:
+        # Hand the product lookup's connection back first: the batch needs one from the same pool
+        await db.close()
+        # Written and committed together with other checkouts arriving at the same moment
+        order_row, item_ids = await checkout_commits.submit(
+            partial(write_order, order_values=order_values, items=items_to_create)
+        )
+    else:
+        order_row, item_ids = await write_order(db, order_values, items_to_create)
+        await db.commit()
+    record_checkout("created", sum(item["quantity"] for item in items_to_create), total)
     
-    db.commit()
-    db.refresh(db_order)
-    return db_order
+    # Build the response from what was just written instead of re-reading it
+    return {
+        **order_values,
+        "id": order_row.id,
+        "version": 1,
+        "created_at": order_row.created_at,
+        "updated_at": None,
+        "items": [
+            {**item_data, "id": item_id, "order_id": order_row.id}
+            for item_data, item_id in zip(items_to_create, item_ids)
+        ]
+    }
 
-@router.get("/", response_model=List[schemas.Order])
-def get_orders(
+@router.get("/", response_model=schemas.OrderPage)
+async def get_orders(
     status: Optional[OrderStatus] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    archived: bool = False,
+    db: AsyncSession = Depends(get_read_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get all orders (admin only), optionally filtered by status"""
-    query = db.query(Order).order_by(Order.created_at.desc())
+    """Get a page of orders (admin only), newest first, optionally filtered by status.
+    ?fields=id,status,total returns only those fields (items only if listed);
+    ?view=summary returns schemas.OrderSummary, without items.
+    ?archived=true pages through the order archive instead (see order_archive.py)."""
+    try:
+        selected = requested_fields(schemas.Order, schemas.OrderSummary, fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_size = min(limit or settings.orders_page_size, settings.orders_max_page_size)
+    model, item_model = (ArchivedOrder, ArchivedOrderItem) if archived else (Order, OrderItem)
+    
+    # Keyset pagination on (created_at, id); items are batch-loaded for the page
+    if selected is not None:
+        # The cursor needs created_at and id even when they weren't asked for
+        names = [name for name in selected if name != "items"]
+        names += [name for name in ("id", "created_at") if name not in names]
+        query = select(*columns(model, names))
+    elif settings.fast_serialization:
+        query = select(*schema_columns(schemas.Order, model))
+    else:
+        query = select(model).options(selectinload(model.items))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
     if status:
-        query = query.filter(Order.status == status)
-    orders = query.all()
-    return orders
+        query = query.where(model.status == status)
+    if cursor:
+        try:
+            created_at, order_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < order_id)
+        ))
+    
+    projected = selected is not None or settings.fast_serialization
+    result = await db.execute(query.limit(page_size + 1))
+    orders = result.all() if projected else result.scalars().all()
+    next_cursor = None
+    if len(orders) > page_size:
+        orders = orders[:page_size]
+        next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    
+    if projected:
+        return await order_page_response(db, orders, next_cursor, selected, item_model)
+    return {"items": orders, "next_cursor": next_cursor}
+
+@router.get("/stats", response_model=schemas.OrderStats)
+async def get_order_stats(
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Sales totals per day, status, product and category (admin only), optionally
+    for the UTC days from `since` to `until` inclusive. Read from the rollup tables,
+    so the cost doesn't grow with the number of orders."""
+    def in_range(query, model):
+        if since:
+            query = query.where(model.day >= since)
+        if until:
+            query = query.where(model.day <= until)
+        return query
+    
+    status_rows = (await db.execute(in_range(
+        select(OrderRollup.day, OrderRollup.status, OrderRollup.orders, OrderRollup.revenue), OrderRollup
+    ).order_by(OrderRollup.day))).all()
+    statuses, days = {}, {}
+    for row in status_rows:
+        bucket = statuses.setdefault(row.status, {"status": row.status, "orders": 0, "revenue": 0.0})
+        bucket["orders"] += row.orders
+        bucket["revenue"] += row.revenue
+        if row.status != OrderStatus.CANCELED:
+            day = days.setdefault(row.day, {"day": row.day, "orders": 0, "revenue": 0.0})
+            day["orders"] += row.orders
+            day["revenue"] += row.revenue
+    
+    units = func.sum(ProductRollup.units)
+    product_rows = (await db.execute(in_range(
+        select(ProductRollup.product_id, Product.name, Product.category, units, func.sum(ProductRollup.revenue))
+        .outerjoin(Product, Product.id == ProductRollup.product_id)
+        .where(ProductRollup.status != OrderStatus.CANCELED)
+        .group_by(ProductRollup.product_id, Product.name, Product.category),
+        ProductRollup
+    ).order_by(units.desc(), ProductRollup.product_id))).all()
+    products, categories = [], {}
+    for product_id, name, category, product_units, revenue in product_rows:
+        if not product_units and not revenue:
+            continue
+        products.append({
+            "product_id": product_id, "product_name": name, "category": category,
+            "units": product_units, "revenue": revenue
+        })
+        bucket = categories.setdefault(category, {"category": category, "units": 0, "revenue": 0.0})
+        bucket["units"] += product_units
+        bucket["revenue"] += revenue
+    
+    return {
+        "days": [day for day in days.values() if day["orders"]],
+        "statuses": [statuses[s] for s in OrderStatus if s in statuses and statuses[s]["orders"]],
+        "products": products,
+        "categories": sorted(categories.values(), key=lambda c: -c["units"]),
+    }
+
+@router.get("/export")
+async def export_orders(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    since: Optional[datetime] = None,
+    status: Optional[OrderStatus] = None,
+    archived: bool = False,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Stream every order (admin only), oldest first, optionally created at or after `since`
+    and filtered by status. CSV has one row per order item; NDJSON one order per line.
+    ?archived=true exports the order archive instead."""
+    return StreamingResponse(
+        # Its own session (possibly a replica's), opened by the stream: the export outlives this handler
+        stream_orders(partial(read_router.session, request), format, since, status, archived),
+        media_type=FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="orders.{format}"',
+            "Cache-Control": "private, no-store",
+            "X-Accel-Buffering": "no",  # Let nginx pass chunks through as they are produced
+        }
+    )
+
+@router.get("/stream")
+async def stream_order_changes(
+    last_event_id: Optional[int] = Header(None),
+    resume_after: Optional[int] = Query(None, alias="last_event_id"),
+    current_admin: Admin = Depends(get_stream_admin)
+):
+    """Server-sent events for new orders (`order.created`) and status changes
+    (`order.updated`), for the admin dashboard instead of polling. Reconnects
+    resume after the Last-Event-ID header (or ?last_event_id=); a `reset`
+    event means the gap is too old to replay and the client should reload."""
+    return StreamingResponse(
+        stream_order_events(last_event_id if last_event_id is not None else resume_after),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "private, no-store",
+            "X-Accel-Buffering": "no",  # Deliver each event as soon as it's written
+        }
+    )
+
+@router.patch("/bulk", response_model=schemas.OrderBulkStatusResult)
+async def update_order_statuses(
+    status_update: schemas.OrderBulkStatusUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Move many orders to one status (admin only), chosen by id or by a filter.
+    Orders are skipped if the move isn't an allowed transition or, when a version is
+    given, if they have changed since; returns the ids updated and the ids rejected."""
+    if (status_update.orders is None) == (status_update.filter is None):
+        raise HTTPException(status_code=422, detail="Give either orders or filter")
+    limit = settings.orders_bulk_max
+    target = status_update.status
+    
+    if status_update.orders is not None:
+        if len(status_update.orders) > limit:
+            raise HTTPException(status_code=422, detail=f"At most {limit} orders per request")
+        requested = list(dict.fromkeys(ref.id for ref in status_update.orders))
+        versioned = [(ref.id, ref.version) for ref in status_update.orders if ref.version is not None]
+        unversioned = [ref.id for ref in status_update.orders if ref.version is None]
+        # An order changed by someone else since they saw it no longer matches its (id, version) pair
+        selection = [or_(
+            tuple_(Order.id, Order.version).in_(versioned) if versioned else False,
+            Order.id.in_(unversioned) if unversioned else False,
+        )]
+    else:
+        selection = []
+        if status_update.filter.status:
+            selection.append(Order.status == status_update.filter.status)
+        if status_update.filter.since:
+            selection.append(Order.created_at >= utc_timestamp(status_update.filter.since))
+        if status_update.filter.until:
+            selection.append(Order.created_at < utc_timestamp(status_update.filter.until))
+        requested = list((await db.scalars(
+            select(Order.id).where(*selection).order_by(Order.id).limit(limit + 1)
+        )).all())
+        if len(requested) > limit:
+            raise HTTPException(status_code=422, detail=f"The filter matches more than {limit} orders; narrow it")
+        # Re-check the filter in the UPDATE, in case an order changed after it was selected
+        selection.append(Order.id.in_(requested))
+    
+    # One UPDATE per status the target can be reached from, so each row's old status is known
+    moved = []
+    for old_status, allowed in ORDER_TRANSITIONS.items():
+        if target not in allowed or not requested:
+            continue
+        rows = await db.execute(
+            update(Order)
+            .where(*selection, Order.status == old_status)
+            .values(status=target, version=Order.version + 1)
+            .returning(Order.id, Order.created_at, Order.total, Order.version)
+            .execution_options(synchronize_session=False)
+        )
+        moved.extend((row, old_status) for row in rows)
+    
+    if moved:
+        items = {}
+        for item in await db.execute(
+            select(OrderItem.order_id, OrderItem.product_id, OrderItem.product_price, OrderItem.quantity)
+            .where(OrderItem.order_id.in_([row.id for row, _ in moved]))
+        ):
+            items.setdefault(item.order_id, []).append(item._asdict())
+        await move_orders(db, [
+            (row.created_at, old_status, target, row.total, items.get(row.id, [])) for row, old_status in moved
+        ])
+        await publish_order_events(db, ORDER_UPDATED, [
+            {"order_id": row.id, "status": target, "total": row.total, "version": row.version} for row, _ in moved
+        ])
+        await db.commit()
+        record_status_change(target.value, len(moved))
+    
+    updated = {row.id for row, _ in moved}
+    return {
+        "updated": [order_id for order_id in requested if order_id in updated],
+        "rejected": [order_id for order_id in requested if order_id not in updated],
+    }
 
 @router.get("/{order_id}", response_model=schemas.Order)
-def get_order(
+async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    archived: bool = False,
+    db: AsyncSession = Depends(get_read_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get a single order by ID (admin only)"""
-    order = db.query(Order).filter(Order.id == order_id).first()
+    """Get a single order by ID (admin only); ?archived=true looks in the order archive"""
+    model = ArchivedOrder if archived else Order
+    if is_conditional(request):
+        # Check the version stamp before loading the order and its items
+        stamp = (await db.execute(
+            select(model.version, model.created_at, model.updated_at).where(model.id == order_id)
+        )).first()
+        if stamp:
+            headers = order_validators(order_id, *stamp)
+            if is_not_modified(request, headers):
+                return not_modified(headers)
+    
+    order = await db.get(model, order_id, options=[selectinload(model.items)])
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    response.headers.update(order_validators(order.id, order.version, order.created_at, order.updated_at))
     return order
 
 @router.patch("/{order_id}", response_model=schemas.Order)
-def update_order_status(
+async def update_order_status(
     order_id: int,
     order_update: schemas.OrderUpdateStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Update order status (admin only)"""
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+    db_order = await db.get(Order, order_id, options=[selectinload(Order.items)])
     if not db_order:
+        if await db.get(ArchivedOrder, order_id):
+            raise HTTPException(status_code=409, detail="Archived orders can't be changed")
         raise HTTPException(status_code=404, detail="Order not found")
     
+    await move_order(
+        db, db_order.created_at, db_order.status, order_update.status, db_order.total,
+        [{"product_id": i.product_id, "product_price": i.product_price, "quantity": i.quantity} for i in db_order.items]
+    )
     db_order.status = order_update.status
-    db.commit()
-    db.refresh(db_order)
+    db_order.version = Order.version + 1
+    await db.flush()
+    # Read the new version back before commit so the event carries it
+    await db.refresh(db_order, ["version", "updated_at"])
+    await publish_order_event(
+        db, ORDER_UPDATED, db_order.id, db_order.status, db_order.total, db_order.version
+    )
+    await db.commit()
+    record_status_change(order_update.status.value)
     return db_order
@@ -1,77 +1,219 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from catalog import bump_catalog_version, catalog_version, catalog_body, publish_catalog_snapshot, SnapshotResponse
+from conditional import validator_headers, is_conditional, is_not_modified, not_modified
+from config import settings
+from database import get_async_db
+from fast_json import PRODUCT_COLUMNS, columns, product_list_response, requested_fields
 from models import Product, Admin
 from auth import get_current_admin
+from product_import import FORMATS as IMPORT_FORMATS, read_lines, ndjson_rows, csv_rows, import_products
+from replicas import get_read_db
+from product_options import (
+    parse_options, replace_product_options, delete_product_options, parse_option_filter, filter_by_options
+)
+from search import search_products
 import schemas
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+def catalog_cache_control() -> str:
+    return f"public, max-age={settings.catalog_cache_max_age_seconds}"
+
+def product_validators(product_id: int, version: int, created_at, updated_at) -> dict:
+    # Product ids are never reused, so (id, version) names one state of one product
+    return validator_headers(
+        f"product-{product_id}-{version}", updated_at or created_at, catalog_cache_control()
+    )
+
 @router.get("/", response_model=List[schemas.Product])
-def get_products(
+async def get_products(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    option: List[str] = Query([]),
+    fields: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all products, optionally filtered by category"""
-    query = db.query(Product)
+    """Get all products, optionally filtered by category and by option values,
+    e.g. ?option=woods:Walnut&option=sizes:16x16 (products offering all of them).
+    ?fields=id,name,price returns only those fields; ?view=summary returns what
+    listing pages show (schemas.ProductSummary)."""
+    try:
+        option_filters = [parse_option_filter(spec) for spec in option]
+        selected = requested_fields(schemas.Product, schemas.ProductSummary, fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Any product write bumps the catalog generation, so it validates every listing
+    version, changed_at = await catalog_version(db)
+    headers = validator_headers(f"catalog-{version}", changed_at, catalog_cache_control())
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    
+    if settings.catalog_snapshot_enabled and not option_filters and fields is None:
+        body = await catalog_body(db, version, category, view)
+        if body is not None:
+            return SnapshotResponse(body, headers=headers)
+    
+    if selected is not None:
+        query = select(*columns(Product, selected))
+    elif settings.fast_serialization:
+        query = select(*PRODUCT_COLUMNS)
+    else:
+        query = select(Product)
+    query = query.order_by(Product.id)
     if category:
-        query = query.filter(Product.category == category)
-    products = query.all()
+        query = query.where(Product.category == category)
+    query = filter_by_options(query, option_filters)
+    if selected is not None or settings.fast_serialization:
+        return await product_list_response(db, query, headers)
+    products = (await db.scalars(query)).all()
+    response.headers.update(headers)
     return products
 
+@router.get("/search", response_model=List[schemas.Product])
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Full-text search over name, short description and description, best matches first.
+    Every word must match as a prefix, e.g. "wal coast" finds "Walnut Coaster Set"."""
+    limit = min(limit or settings.search_default_limit, settings.search_max_limit)
+    return await search_products(db, q, limit)
+
+@router.post("/bulk", response_model=schemas.ProductImportResult)
+async def bulk_import_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Create or update products from an NDJSON (application/x-ndjson) or CSV (text/csv)
+    upload, matched on sku (admin only). Rows that fail validation are skipped and
+    reported; every valid row is written in one transaction."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    import_format = IMPORT_FORMATS.get(content_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send one of: {', '.join(IMPORT_FORMATS)}"
+        )
+    
+    lines = read_lines(request.stream())
+    rows = ndjson_rows(lines) if import_format == "ndjson" else csv_rows(lines)
+    result = await import_products(db, rows)
+    if result["created"] or result["updated"]:
+        await bump_catalog_version(db)
+        await db.commit()
+        if settings.catalog_snapshot_enabled:
+            await publish_catalog_snapshot(db)
+    return result
+
 @router.get("/{product_id}", response_model=schemas.Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
     """Get a single product by ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    if is_conditional(request):
+        # Check the version stamp before loading the full row
+        stamp = (await db.execute(
+            select(Product.version, Product.created_at, Product.updated_at).where(Product.id == product_id)
+        )).first()
+        if stamp:
+            headers = product_validators(product_id, *stamp)
+            if is_not_modified(request, headers):
+                return not_modified(headers)
+    
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    response.headers.update(
+        product_validators(product.id, product.version, product.created_at, product.updated_at)
+    )
     return product
 
 @router.post("/", response_model=schemas.Product, status_code=status.HTTP_201_CREATED)
-def create_product(
+async def create_product(
     product: schemas.ProductCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Create a new product (admin only)"""
+    try:
+        options = parse_options(product.options)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
     db_product = Product(**product.model_dump())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    try:
+        await db.flush()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="A product with this SKU already exists")
+    await replace_product_options(db, db_product.id, options, existing=False)
+    await bump_catalog_version(db)
+    await db.commit()
+    await db.refresh(db_product)
+    if settings.catalog_snapshot_enabled:
+        await publish_catalog_snapshot(db)
     return db_product
 
 @router.put("/{product_id}", response_model=schemas.Product)
-def update_product(
+async def update_product(
     product_id: int,
     product: schemas.ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Update a product (admin only)"""
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = await db.get(Product, product_id)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     update_data = product.model_dump(exclude_unset=True)
+    if "options" in update_data:
+        try:
+            options = parse_options(update_data["options"])
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        await replace_product_options(db, product_id, options)
     for key, value in update_data.items():
         setattr(db_product, key, value)
+    db_product.version = Product.version + 1
     
-    db.commit()
-    db.refresh(db_product)
+    await bump_catalog_version(db)
+    try:
+        await db.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="A product with this SKU already exists")
+    await db.refresh(db_product)
+    if settings.catalog_snapshot_enabled:
+        await publish_catalog_snapshot(db)
     return db_product
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(
+async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete a product (admin only)"""
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = await db.get(Product, product_id)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    db.delete(db_product)
-    db.commit()
+    await delete_product_options(db, product_id)
+    await db.delete(db_product)
+    await bump_catalog_version(db)
+    await db.commit()
+    if settings.catalog_snapshot_enabled:
+        await publish_catalog_snapshot(db)
     return None
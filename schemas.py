@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from models import OrderStatus
 
 # ===== Product Schemas =====
@@ -12,6 +12,7 @@ class ProductBase(BaseModel):
     category: str
     image_url: Optional[str] = None
     options: Optional[str] = None  # JSON string
+    sku: Optional[str] = None
 
 class ProductCreate(ProductBase):
     pass
@@ -30,6 +31,28 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductSummary(BaseModel):
+    """?view=summary: what catalog listing pages show"""
+    id: int
+    name: str
+    short_description: Optional[str] = None
+    price: float
+    category: str
+    image_url: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class ProductImportError(BaseModel):
+    line: int  # Line of the uploaded file the row starts on
+    sku: Optional[str] = None
+    errors: List[str]
+
+class ProductImportResult(BaseModel):
+    created: int
+    updated: int
+    errors: List[ProductImportError] = []
+
 # ===== Order Item Schemas =====
 class OrderItemBase(BaseModel):
     product_id: int
@@ -68,6 +91,7 @@ class Order(OrderBase):
     id: int
     status: OrderStatus
     total: float
+    version: int  # Bumped on every change; send it back to PATCH /orders/bulk
     created_at: datetime
     updated_at: Optional[datetime] = None
     items: List[OrderItem] = []
@@ -75,6 +99,74 @@ class Order(OrderBase):
     class Config:
         from_attributes = True
 
+class OrderSummary(BaseModel):
+    """?view=summary: what the admin order list shows (no address, note or items)"""
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    status: OrderStatus
+    total: float
+    version: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class OrderRef(BaseModel):
+    id: int
+    version: Optional[int] = None  # If given, the order is left alone when it has changed since
+
+class OrderBulkFilter(BaseModel):
+    status: Optional[OrderStatus] = None
+    since: Optional[datetime] = None  # created_at >= since
+    until: Optional[datetime] = None  # created_at < until
+
+class OrderBulkStatusUpdate(BaseModel):
+    # Exactly one of orders / filter
+    status: OrderStatus
+    orders: Optional[List[OrderRef]] = None
+    filter: Optional[OrderBulkFilter] = None
+
+class OrderBulkStatusResult(BaseModel):
+    updated: List[int]
+    rejected: List[int]  # Not found, changed since the given version, or not allowed to move to the status
+
+class OrderPage(BaseModel):
+    items: List[Order]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the next page
+
+# ===== Sales Stats Schemas =====
+class DailySales(BaseModel):
+    day: date
+    orders: int
+    revenue: float
+
+class StatusSales(BaseModel):
+    status: OrderStatus
+    orders: int
+    revenue: float
+
+class ProductSales(BaseModel):
+    product_id: int
+    product_name: Optional[str] = None  # None once the product has been deleted
+    category: Optional[str] = None
+    units: int
+    revenue: float
+
+class CategorySales(BaseModel):
+    category: Optional[str] = None
+    units: int
+    revenue: float
+
+class OrderStats(BaseModel):
+    # days, products and categories leave out canceled orders; statuses covers every order
+    days: List[DailySales]
+    statuses: List[StatusSales]
+    products: List[ProductSales]
+    categories: List[CategorySales]
+
 # ===== Auth Schemas =====
 class AdminLogin(BaseModel):
     email: EmailStr
@@ -0,0 +1,43 @@
+import re
+from typing import List
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Product
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Search index objects created by migration 0004 (not mapped in models.py)
+products_fts = table("products_fts", column("rowid"))
+search_vector = literal_column("products.search_vector")
+
+def search_terms(q: str) -> List[str]:
+    """Words in a user query; punctuation and search-syntax characters are dropped"""
+    return _WORD.findall(q.lower())
+
+async def search_products(db: AsyncSession, q: str, limit: int) -> List[Product]:
+    """Products matching every word of q (each as a prefix), best matches first.
+    Name matches outrank short description matches, which outrank description matches."""
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    if db.bind.dialect.name == "postgresql":
+        query = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        statement = (
+            select(Product)
+            .where(search_vector.op("@@")(query))
+            .order_by(func.ts_rank(search_vector, query).desc(), Product.id)
+            .limit(limit)
+        )
+    else:
+        # FTS5 index kept in sync by triggers; bm25() is lower-is-better
+        match = " ".join(f'"{term}"*' for term in terms)
+        fts = literal_column("products_fts")
+        statement = (
+            select(Product)
+            .join(products_fts, products_fts.c.rowid == Product.id)
+            .where(fts.op("MATCH")(match))
+            .order_by(func.bm25(fts, 10.0, 5.0, 1.0), Product.id)
+            .limit(limit)
+        )
+    return list((await db.scalars(statement)).all())